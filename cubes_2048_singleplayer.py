@@ -19,15 +19,27 @@ import random
 from collections import deque
 from enum import Enum
 
+from snake2048.game.chunks import ChunkedWorld
+from snake2048.game.collision import swept_hit, swept_pair_hit
+from snake2048.game.influence import InfluenceMap
+from snake2048.game.timestep import FixedTimestep
+from snake2048.game.overlay import ProfilerOverlay
+from snake2048.profiler import profiler
+
 # ---------------------------------------------------------------------------
 # Configuration constants
 # ---------------------------------------------------------------------------
 MAP_SIZE = 100                             # size of the square arena
-INITIAL_CUBES = 30                         # number of cubes to spawn at start
+INITIAL_CUBES = 30                         # cubes across the arena at start (sets chunk density)
 BOT_COUNT = 10                             # how many AI snakes
 BOOST_SPEED = 8                            # movement speed while boosting
 NORMAL_SPEED = 4                           # base movement speed
 BOOST_DROP_INTERVAL = 1.0                  # seconds between dropping a tail cube
+CHUNK_SIZE = 20                            # side of a world chunk
+VIEW_RADIUS = 50                           # ground distance from the camera focus that gets entities
+CUBES_PER_CHUNK = INITIAL_CUBES * CHUNK_SIZE ** 2 / MAP_SIZE ** 2
+INFLUENCE_CELL_SIZE = 5                    # side of an influence map cell
+BOT_VIEW_DISTANCE = 15                     # how far bots sample the influence map
 
 # Color mapping for cube values (extend as needed)
 CUBE_COLORS = {
@@ -54,6 +66,14 @@ def text_color_for(bg):
     return color.black if brightness > 0.5 else color.white
 
 
+# Label colours per cube value, computed once instead of per cube
+LABEL_COLORS = {value: text_color_for(col) for value, col in CUBE_COLORS.items()}
+
+
+def label_color_for(value):
+    return LABEL_COLORS.get(value, color.black)
+
+
 def play_sound(name):
     """Placeholder for sound effect calls."""
     print(f"play_sound: {name}")
@@ -66,18 +86,27 @@ class Cube(Entity):
     """Collectible or snake body cube with a numeric value."""
 
     def __init__(self, value=2, position=(0, 0.5, 0), parent=None):
-        col = CUBE_COLORS.get(value, color.white)
-        super().__init__(model="cube", color=col, position=position,
-                         scale=1, collider="box", parent=parent)
+        # No collider: collisions are distance based and mouse picking
+        # should only hit the arena
+        super().__init__(model="cube", color=CUBE_COLORS.get(value, color.white),
+                         position=position, scale=1, parent=parent)
         self.value = value
         self.label = Text(str(value), parent=self, scale=8, y=0.6,
-                          origin=(0, 0), color=text_color_for(col))
+                          origin=(0, 0), color=label_color_for(value))
+        # Simulated position; ``position`` is only the interpolated render one
+        self.sim_position = Vec3(*position)
+        self.prev_sim_position = self.sim_position
+
+    def interpolate(self, alpha):
+        self.position = lerp(self.prev_sim_position, self.sim_position, alpha)
 
     def set_value(self, value):
+        if value == self.value:
+            return
         self.value = value
         self.color = CUBE_COLORS.get(value, color.white)
         self.label.text = str(value)
-        self.label.color = text_color_for(self.color)
+        self.label.color = label_color_for(value)
 
 
 class Snake:
@@ -101,58 +130,72 @@ class Snake:
         head.color = color
         head.label.color = text_color_for(color)
         self.segments.append(head)
+        self.prev_head_position = head.sim_position  # head at the start of the last step
         self.name_tag = Text(self.name, scale=1.5, origin=(0,0), parent=camera.ui)
 
     # ------------------------------------------------------------------
     # Movement and segment following
     # ------------------------------------------------------------------
-    def update(self):
+    def step(self, dt):
+        """Advance the simulation by one fixed step of ``dt`` seconds."""
         if not self.alive:
             return
+        for seg in self.segments:
+            seg.prev_sim_position = seg.sim_position
 
         # Determine target direction
         if not self.is_bot:
-            self._update_direction_from_mouse()
+            self._update_direction_from_mouse(dt)
         # AI bots override this method to choose direction
 
         # Apply boost if active
         current_speed = BOOST_SPEED if self.boosting else NORMAL_SPEED
 
-        # Move head
-        self.segments[0].position += self.direction * current_speed * time.dt
+        # Move head, remembering where it started for swept collision tests
+        head = self.segments[0]
+        self.prev_head_position = head.sim_position
+        head.sim_position = head.sim_position + self.direction * current_speed * dt
 
         # Record ghost position for trailing segments
-        self.ghost_trail.appendleft(Vec3(self.segments[0].position))
-        max_len = int(len(self.segments) * self.ghost_spacing / (current_speed * time.dt)) + 10
-        if len(self.ghost_trail) > max_len:
+        self.ghost_trail.appendleft(head.sim_position)
+        max_len = int(len(self.segments) * self.ghost_spacing / (current_speed * dt)) + 10
+        while len(self.ghost_trail) > max_len:
             self.ghost_trail.pop()
 
         # Update tail segments by following ghost trail with spacing
         for i in range(1, len(self.segments)):
-            idx = int(i * self.ghost_spacing / (current_speed * time.dt))
+            idx = int(i * self.ghost_spacing / (current_speed * dt))
             if idx < len(self.ghost_trail):
                 target = self.ghost_trail[idx]
-                self.segments[i].position = lerp(self.segments[i].position, target, 8 * time.dt)
-
-        # Update UI name tag above head
-        screen_pos = camera.world_to_screen_point(self.segments[0].position + Vec3(0,1.5,0))
-        self.name_tag.position = (screen_pos.x, screen_pos.y)
+                self.segments[i].sim_position = lerp(self.segments[i].sim_position, target, 8 * dt)
 
         # Handle boost cost
         if self.boosting:
-            self._boost_timer += time.dt
+            self._boost_timer += dt
             if self._boost_timer > BOOST_DROP_INTERVAL:
                 self._boost_timer = 0
                 self.drop_tail_cube()
 
-    def _update_direction_from_mouse(self):
+    def render(self, alpha):
+        """Place entities between the last two simulated states."""
+        if not self.alive:
+            return
+        for seg in self.segments:
+            seg.interpolate(alpha)
+
+        # Update UI name tag above head
+        screen_pos = camera.world_to_screen_point(self.segments[0].position + Vec3(0,1.5,0))
+        self.name_tag.position = (screen_pos.x, screen_pos.y)
+
+    def _update_direction_from_mouse(self, dt):
         """Rotate head towards mouse position on the plane."""
         if not mouse.world_point:
             return
+        head = self.segments[0]
         target = mouse.world_point
-        target.y = self.segments[0].y
-        self.direction = lerp(self.direction, (target - self.segments[0].position).normalized(), 4 * time.dt)
-        self.segments[0].look_at(target)
+        target.y = head.sim_position.y
+        self.direction = lerp(self.direction, (target - head.sim_position).normalized(), 4 * dt)
+        head.look_at(target)
 
     def drop_tail_cube(self):
         """Remove smallest cube when boosting."""
@@ -162,7 +205,7 @@ class Snake:
         play_sound('boost_drop')
         segment = self.segments.pop()
         self.score -= segment.value
-        spawn_collectible_cube(segment.position, value=segment.value)
+        spawn_collectible_cube(segment.sim_position, value=segment.value)
         destroy(segment)
 
     # ------------------------------------------------------------------
@@ -171,9 +214,8 @@ class Snake:
     def collect_cube(self, cube):
         """Add cube to tail and trigger merging logic."""
         play_sound('collect')
-        cube.disable()
-        destroy(cube)
-        new_seg = Cube(value=cube.value, position=self.segments[-1].position)
+        world.remove(cube)
+        new_seg = Cube(value=cube.value, position=self.segments[-1].sim_position)
         new_seg.color = self.color
         self.segments.append(new_seg)
         self.score += cube.value
@@ -206,9 +248,16 @@ class Snake:
         for other in snakes:
             if other is self or not other.alive:
                 continue
-            # Collision with any cube of other snake
+            # Collision with any cube of other snake, swept along this step's
+            # head movement so fast heads cannot tunnel through
+            other_head = other.segments[0]
             for seg in other.segments:
-                if distance(head.position, seg.position) < 0.9:
+                if seg is other_head:
+                    hit = swept_pair_hit(self.prev_head_position, head.sim_position,
+                                         other.prev_head_position, seg.sim_position, 0.9)
+                else:
+                    hit = swept_hit(self.prev_head_position, head.sim_position, seg.sim_position, 0.9)
+                if hit:
                     self._handle_collision(other, seg)
                     return
 
@@ -230,7 +279,7 @@ class Snake:
             # colliding with enemy tail cube
             if head_value >= seg_value:
                 other.remove_segment(segment)
-                new = Cube(value=seg_value, position=self.segments[-1].position)
+                new = Cube(value=seg_value, position=self.segments[-1].sim_position)
                 new.color = self.color
                 self.segments.append(new)
                 self.score += seg_value
@@ -243,7 +292,7 @@ class Snake:
     def absorb_other(self, other):
         play_sound('eat_player')
         for seg in other.segments:
-            spawn_collectible_cube(seg.position, value=seg.value)
+            spawn_collectible_cube(seg.sim_position, value=seg.value)
             destroy(seg)
         other.segments.clear()
         other.alive = False
@@ -252,14 +301,14 @@ class Snake:
     def remove_segment(self, segment):
         if segment in self.segments:
             self.segments.remove(segment)
-            spawn_collectible_cube(segment.position, value=segment.value)
+            spawn_collectible_cube(segment.sim_position, value=segment.value)
             destroy(segment)
 
     def die(self, killer=None):
         play_sound('death')
         self.alive = False
         for seg in self.segments:
-            spawn_collectible_cube(seg.position, value=seg.value)
+            spawn_collectible_cube(seg.sim_position, value=seg.value)
             destroy(seg)
         self.segments.clear()
         kill_feed.add_message(f"{self.name} was killed" + (f" by {killer.name}" if killer else ""))
@@ -283,37 +332,36 @@ class BotSnake(Snake):
         self.state = BotState.FARMING
         self.target_pos = None
 
-    def update(self):
+    def step(self, dt):
         if not self.alive:
             return
         self.decide_state()
-        self.act_state()
-        super().update()
+        self.act_state(dt)
+        super().step(dt)
 
     def decide_state(self):
-        """Pick behaviour based on nearby snakes."""
-        self.state = BotState.FARMING
-        my_value = self.segments[0].value
-        for snake in snakes:
-            if snake is self or not snake.alive:
-                continue
-            d = distance(self.segments[0].position, snake.segments[0].position)
-            if d < 15:
-                if snake.segments[0].value * 1.5 < my_value:
-                    self.state = BotState.HUNTING
-                    self.target_pos = snake.segments[0].position
-                    return
-                elif snake.segments[0].value > my_value * 1.5:
-                    self.state = BotState.FLEEING
-                    self.target_pos = self.segments[0].position - (snake.segments[0].position - self.segments[0].position)
-                    return
+        """Pick behaviour and steering from the shared influence map."""
+        head = self.segments[0]
+        my_pos = head.sim_position
+        dx, dz, threatened, hunting = influence.steer(
+            my_pos.x, my_pos.z, head.value, BOT_VIEW_DISTANCE, key=self)
+        if threatened:
+            self.state = BotState.FLEEING
+        elif hunting:
+            self.state = BotState.HUNTING
+        else:
+            self.state = BotState.FARMING
+
+        if dx or dz:
+            self.target_pos = my_pos + Vec3(dx, 0, dz).normalized() * BOT_VIEW_DISTANCE
+            return
 
-        # Default: look for nearest cube
-        cubes = collectible_cubes
-        if cubes:
-            self.target_pos = min(cubes, key=lambda c: distance(c.position, self.segments[0].position)).position
+        # Nothing in view: head for the nearest cube
+        cube = world.nearest(my_pos.x, my_pos.z)
+        if cube:
+            self.target_pos = Vec3(*cube.position)
 
-    def act_state(self):
+    def act_state(self, dt):
         if self.state == BotState.HUNTING:
             self.boosting = True
         elif self.state == BotState.FLEEING:
@@ -322,14 +370,27 @@ class BotSnake(Snake):
             self.boosting = False
 
         if self.target_pos is not None:
-            self.direction = lerp(self.direction, (self.target_pos - self.segments[0].position).normalized(), 3 * time.dt)
+            self.direction = lerp(self.direction, (self.target_pos - self.segments[0].sim_position).normalized(), 3 * dt)
             self.segments[0].look_at(self.target_pos)
 
 
 # ---------------------------------------------------------------------------
 # Collectible cubes utilities
 # ---------------------------------------------------------------------------
-collectible_cubes = []
+# Cubes live in the chunked world as plain data; Cube entities only exist for
+# chunks around the point the camera is looking at. The influence map bots
+# steer by follows every cube added or removed.
+influence = InfluenceMap(cell_size=INFLUENCE_CELL_SIZE)
+world = ChunkedWorld(
+    size=MAP_SIZE,
+    chunk_size=CHUNK_SIZE,
+    cubes_per_chunk=CUBES_PER_CHUNK,
+    view_radius=VIEW_RADIUS,
+    materialize=lambda cube: Cube(value=cube.value, position=cube.position),
+    dematerialize=destroy,
+    on_add=influence.add_cube,
+    on_remove=influence.remove_cube,
+)
 
 
 def spawn_collectible_cube(position=None, value=None):
@@ -337,10 +398,15 @@ def spawn_collectible_cube(position=None, value=None):
         x = random.uniform(-MAP_SIZE/2, MAP_SIZE/2)
         z = random.uniform(-MAP_SIZE/2, MAP_SIZE/2)
         position = Vec3(x, 0.5, z)
-    value = value or random.choices([2, 4, 8], weights=[0.6, 0.3, 0.1])[0]
-    cube = Cube(value=value, position=position)
-    collectible_cubes.append(cube)
-    return cube
+    return world.add(position[0], position[2], value=value, y=position[1])
+
+
+def camera_focus():
+    """Point on the ground plane the camera is looking at."""
+    forward = camera.forward
+    if forward.y >= -0.01:
+        return camera.world_position
+    return camera.world_position + forward * (camera.world_y / -forward.y)
 
 # ---------------------------------------------------------------------------
 # Kill feed UI
@@ -393,9 +459,13 @@ class Game:
         self.leaderboard = Text("", origin=(0,0), position=(0.7,0.45), scale=1.2, parent=camera.ui)
         self.game_msg = Text("", scale=3, origin=(0,0), parent=camera.ui, enabled=False)
         self.menu_text = Text("CUBES 2048.io\nClick to start", scale=3, origin=(0,0), parent=camera.ui)
+        self.profiler_overlay = ProfilerOverlay()
+        profiler.dump_on_exit()
 
         self.player = None
         self.bots = []
+        # Simulation runs at a fixed rate; rendering interpolates between steps
+        self.sim_clock = FixedTimestep()
 
         self.app.run(self.update)
 
@@ -407,8 +477,8 @@ class Game:
         self.bots = [BotSnake(name=f"Bot{i}") for i in range(BOT_COUNT)]
         global snakes
         snakes = [self.player] + self.bots
-        for _ in range(INITIAL_CUBES):
-            spawn_collectible_cube()
+        world.populate_all()
+        self.sim_clock.reset()
         self.game_msg.enabled = False
 
     def show_end(self):
@@ -418,9 +488,8 @@ class Game:
         invoke(self.reset_to_menu, delay=3)
 
     def reset_to_menu(self):
-        for cube in collectible_cubes[:]:
-            destroy(cube)
-        collectible_cubes.clear()
+        world.clear()
+        influence.clear()
         for s in snakes:
             for seg in s.segments:
                 destroy(seg)
@@ -437,48 +506,82 @@ class Game:
             return
 
         if self.state in (GameState.PLAYING, GameState.DEATH):
-            for cube in collectible_cubes:
-                if distance(self.player.segments[0].position, cube.position) < 1:
-                    self.player.collect_cube(cube)
-                    collectible_cubes.remove(cube)
-            for bot in self.bots:
-                for cube in collectible_cubes[:]:
-                    if distance(bot.segments[0].position, cube.position) < 1:
-                        bot.collect_cube(cube)
-                        collectible_cubes.remove(cube)
-
-            # Update snakes
-            for s in snakes:
-                s.boosting = held_keys['shift'] if s is self.player else s.boosting
-                s.update()
+            with profiler.scope('frame'):
+                self.update_playing()
 
-            # Combat checks
-            for s in snakes:
-                s.check_combat(snakes)
+        if self.state == GameState.END:
+            # wait for reset via invoke
+            pass
 
-            # Remove dead snakes and spawn cubes from their body handled inside die()
-            if not self.player.alive and self.state == GameState.PLAYING:
-                self.state = GameState.DEATH
-                self.game_msg.text = "KILLED"
-                self.game_msg.enabled = True
-                invoke(self.show_end, delay=2)
+    def update_playing(self):
+        """Per-frame work while a match is running, timed per phase."""
+        for _ in range(self.sim_clock.advance(time.dt)):
+            self.simulate(self.sim_clock.dt)
 
-            # Periodically spawn new cubes
-            if len(collectible_cubes) < INITIAL_CUBES:
-                spawn_collectible_cube()
+        with profiler.scope('render'):
+            for s in snakes:
+                s.render(self.sim_clock.alpha)
+
+        # Keep entities near the camera
+        with profiler.scope('streaming'):
+            focus = camera_focus()
+            world.update_focus(focus.x, focus.z)
 
-            # Leaderboard update
+        # Leaderboard update
+        with profiler.scope('leaderboard'):
             alive_snakes = [s for s in snakes if s.alive]
             scores = sorted([(s.name, s.score) for s in alive_snakes], key=lambda x: x[1], reverse=True)
             board = "Leaderboard\n" + "\n".join(f"{name}: {score}" for name, score in scores[:10])
             self.leaderboard.text = board
 
+        with profiler.scope('kill_feed'):
             kill_feed.update()
 
-        if self.state == GameState.END:
-            # wait for reset via invoke
-            pass
+    def simulate(self, dt):
+        """One fixed simulation step of ``dt`` seconds."""
+        # Only cubes in the chunks around each head are tested
+        with profiler.scope('pickup'):
+            for s in snakes:
+                if not s.alive:
+                    continue
+                head = s.segments[0].sim_position
+                reach = 1 + distance(s.prev_head_position, head)
+                for cube in world.near(head.x, head.z, reach):
+                    if swept_hit(s.prev_head_position, head, cube.position, 1):
+                        s.collect_cube(cube)
+
+        # Re-stamp snakes on the influence map bots sample
+        with profiler.scope('influence'):
+            for s in snakes:
+                if not s.alive:
+                    influence.remove_snake(s)
+                    continue
+                head = s.segments[0]
+                influence.update_snake(
+                    s, (head.sim_position.x, head.sim_position.z, head.value),
+                    ((seg.sim_position.x, seg.sim_position.z, seg.value) for seg in s.segments[1:]))
+
+        # Update snakes
+        with profiler.scope('snakes'):
+            for s in snakes:
+                s.boosting = held_keys['shift'] if s is self.player else s.boosting
+                s.step(dt)
+
+        # Combat checks
+        with profiler.scope('combat'):
+            for s in snakes:
+                s.check_combat(snakes)
+
+        # Remove dead snakes and spawn cubes from their body handled inside die()
+        if not self.player.alive and self.state == GameState.PLAYING:
+            self.state = GameState.DEATH
+            self.game_msg.text = "KILLED"
+            self.game_msg.enabled = True
+            invoke(self.show_end, delay=2)
 
+        # Refill depleted chunks in batches
+        with profiler.scope('spawning'):
+            world.refill()
 
 # ---------------------------------------------------------------------------
 # Entry point
@@ -1,5 +1,7 @@
-from ursina import *
-from snake2048.game.entities import CollectibleCube
+from time import perf_counter
+startup_started = perf_counter()
+
+from ursina import Ursina, Entity, Text, Vec3, camera, color, destroy, mouse, time
 from snake2048.game.snake import (
     Snake,
     spawn_collectible_cube,
@@ -7,8 +9,11 @@ from snake2048.game.snake import (
     other_players,
     set_restart_callback,
 )
-from snake2048.network.client import WebSocketClient
+from snake2048.game.overlay import ProfilerOverlay
+from snake2048.game.timestep import FixedTimestep
+from snake2048.profiler import profiler
 import asyncio
+import os
 import threading
 
 # Initialize application
@@ -33,6 +38,8 @@ score_text = Text("Score: 0", position=(-0.8, 0.45), scale=2, color=color.white)
 size_text = Text("Size: 1", position=(-0.8, 0.4), scale=2, color=color.white)
 leaderboard_text = Text("Leaderboard:", position=(0.55, 0.45), scale=1.5, color=color.white)
 game_over_text = Text("", position=(0,0), scale=3, color=color.red, origin=(0,0), enabled=False)
+profiler_overlay = ProfilerOverlay()
+profiler.dump_on_exit()
 
 # Local snake and camera controller
 def restart_game():
@@ -65,14 +72,20 @@ class CameraController:
 
 camera_controller = CameraController()
 
-# WebSocket client
-ws_client = WebSocketClient()
+# WebSocket client, created on the network thread so the websockets stack is
+# only imported once the window is up
+ws_client = None
 
 async def ws_receive(data):
     if data['type'] != 'game_state_update':
         return
+    players = data['game_state']['players']
+    # Drop players the server no longer reports, e.g. bots removed for humans
+    for pid in [pid for pid in other_players if pid not in players]:
+        for segment in other_players.pop(pid).segments:
+            destroy(segment)
     # Update other players
-    for pid, pdata in data['game_state']['players'].items():
+    for pid, pdata in players.items():
         if pid == 'local_player':
             continue
         snake = other_players.get(pid)
@@ -80,17 +93,22 @@ async def ws_receive(data):
             snake = Snake(player_id=pid, player_color=color.red)
             other_players[pid] = snake
         if pdata['alive']:
+            if not snake.alive:
+                # Respawned (server bots reuse their id)
+                for segment in snake.segments:
+                    segment.visible = True
+            while len(snake.segments) > len(pdata['segments']) > 0:
+                destroy(snake.segments.pop())
             while len(snake.segments) < len(pdata['segments']):
                 snake.grow(2)
             for seg, sdata in zip(snake.segments, pdata['segments']):
-                seg.position = Vec3(*sdata[:3])
-                seg.value = sdata[3]
-                seg.text_entity.text = str(seg.value)
-            snake.head.position = Vec3(*pdata['position'])
-            snake.head.value = pdata['head_value']
-            snake.head.text_entity.text = str(pdata['head_value'])
+                seg.place(sdata[:3])
+                seg.set_value(sdata[3])
+            snake.head.place(pdata['position'])
+            snake.head.set_value(pdata['head_value'])
+            snake.direction = Vec3(*pdata['direction'])
             snake.alive = True
-        else:
+        elif snake.alive:
             snake.die()
 
     # Update cubes
@@ -99,22 +117,25 @@ async def ws_receive(data):
         if cube.cube_id not in server_ids:
             destroy(cube)
             collectible_cubes.remove(cube)
+    local_ids = {c.cube_id for c in collectible_cubes}
     for cube_data in data['game_state']['collectible_cubes']:
-        if not any(c.cube_id == cube_data['id'] for c in collectible_cubes):
+        if cube_data['id'] not in local_ids:
             spawn_collectible_cube(position=Vec3(*cube_data['position']), value=cube_data['value'], cube_id=cube_data['id'])
 
-ws_client.set_receive_callback(ws_receive)
-
 async def send_state_loop():
     while True:
         if ws_client.websocket and ws_client.websocket.open and local_snake.alive:
+            head = local_snake.head.sim_position
             payload = {
                 'type': 'player_state',
                 'id': 'local_player',
-                'position': [local_snake.head.x, local_snake.head.y, local_snake.head.z],
+                'position': [head.x, head.y, head.z],
                 'direction': [local_snake.direction.x, local_snake.direction.y, local_snake.direction.z],
                 'head_value': local_snake.head.value,
-                'segments': [[s.x, s.y, s.z, s.value] for s in local_snake.segments]
+                'segments': [
+                    [s.sim_position.x, s.sim_position.y, s.sim_position.z, s.value]
+                    for s in local_snake.segments
+                ]
             }
             await ws_client.send(payload)
         await asyncio.sleep(0.1)
@@ -127,34 +148,66 @@ def setup_game():
 
 setup_game()
 
+startup_reported = False
+
+
+def report_startup():
+    global startup_reported
+    startup_reported = True
+    print(f"Startup took {(perf_counter() - startup_started) * 1000:.0f} ms")
+
+# Simulation runs at a fixed rate; rendering interpolates between steps
+sim_clock = FixedTimestep()
+
+
+def simulate(dt):
+    with profiler.scope('local_snake'):
+        if local_snake.alive:
+            local_snake.step(dt)
+            local_snake.check_collision(ws_client)
+    with profiler.scope('remote'):
+        for snake in other_players.values():
+            snake.step(dt)
+    with profiler.scope('combat'):
+        all_snakes = [local_snake] + list(other_players.values())
+        for snake in all_snakes:
+            snake.check_collision_with_other_snakes(all_snakes, ws_client)
+
 # Main update loop
 def update():
-    if local_snake.alive:
-        local_snake.update()
-        local_snake.check_collision(ws_client)
-    else:
-        game_over_text.text = "GAME OVER"
-        game_over_text.enabled = True
-    for snake in other_players.values():
-        snake.update()
-    all_snakes = [local_snake] + list(other_players.values())
-    for snake in all_snakes:
-        snake.check_collision_with_other_snakes(all_snakes, ws_client)
-    camera_controller.update()
-    score_text.text = f"Score: {local_snake.score}"
-    size_text.text = f"Size: {len(local_snake.segments)}"
-    # Leaderboard
-    players = [(local_snake.player_id, local_snake.score)] + [
-        (pid, s.score) for pid, s in other_players.items()
-    ]
-    players.sort(key=lambda x: x[1], reverse=True)
-    leaderboard_text.text = "Leaderboard:\n" + "\n".join(
-        f"{pid}: {score}" for pid, score in players
-    )
+    if not startup_reported:
+        report_startup()
+    with profiler.scope('frame'):
+        for _ in range(sim_clock.advance(time.dt)):
+            simulate(sim_clock.dt)
+        with profiler.scope('render'):
+            local_snake.render(sim_clock.alpha)
+            for snake in other_players.values():
+                snake.render(sim_clock.alpha)
+        if not local_snake.alive:
+            game_over_text.text = "GAME OVER"
+            game_over_text.enabled = True
+        with profiler.scope('camera'):
+            camera_controller.update()
+        with profiler.scope('hud'):
+            score_text.text = f"Score: {local_snake.score}"
+            size_text.text = f"Size: {len(local_snake.segments)}"
+            # Leaderboard
+            players = [(local_snake.player_id, local_snake.score)] + [
+                (pid, s.score) for pid, s in other_players.items()
+            ]
+            players.sort(key=lambda x: x[1], reverse=True)
+            leaderboard_text.text = "Leaderboard:\n" + "\n".join(
+                f"{pid}: {score}" for pid, score in players
+            )
 
 # Start websocket in separate thread
 
 def start_ws():
+    global ws_client
+    from snake2048.network.client import WebSocketClient
+    ws_client = WebSocketClient(os.environ.get('SNAKE2048_SERVER', 'ws://localhost:8765'))
+    ws_client.set_receive_callback(ws_receive)
     asyncio.run(ws_client.run(send_state_loop()))
 
 threading.Thread(target=start_ws, daemon=True).start()
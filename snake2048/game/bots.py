@@ -0,0 +1,162 @@
+"""Headless AI snakes that the game server simulates as regular players.
+
+Bots follow the same farming / hunting / fleeing behaviour as ``BotSnake`` in
+the single player prototype but work on the server's plain game state, so they
+need neither Ursina nor a websocket.
+"""
+import math
+import random
+from collections import deque
+
+from . import rules
+from .collision import swept_hit, swept_pair_hit
+
+BOT_SPEED = 5               # same as the client's Snake.speed
+SEGMENT_SPACING = 1.0
+TURN_RATE = 3.0             # how quickly the direction follows the target
+VIEW_DISTANCE = 15          # snakes closer than this are hunted or fled from
+WALL_MARGIN = 3             # steer back to the centre this close to the edge
+RESPAWN_DELAY = 3.0
+
+
+class HeadlessBot:
+    """AI snake described with the same fields the server keeps for humans."""
+
+    def __init__(self, player_id, limit=rules.ARENA_LIMIT):
+        self.player_id = player_id
+        self.limit = limit
+        self.respawn()
+
+    def respawn(self):
+        spawn = self.limit * 0.8
+        self.x = random.uniform(-spawn, spawn)
+        self.z = random.uniform(-spawn, spawn)
+        angle = random.uniform(0, 2 * math.pi)
+        self.dx, self.dz = math.cos(angle), math.sin(angle)
+        self.prev_position = self.position
+        self.values = [2]           # segment values, head first
+        self.segments = [[self.x, 0.5, self.z, 2]]
+        self.trail = deque()
+        self.target = None
+        self.alive = True
+        self.score = 0
+        self.respawn_timer = 0.0
+
+    @property
+    def position(self):
+        return (self.x, 0.5, self.z)
+
+    @property
+    def head_value(self):
+        return self.values[0]
+
+    # ------------------------------------------------------------------
+    # Behaviour
+    # ------------------------------------------------------------------
+    def decide(self, players, cubes):
+        """Pick a target from ``(player_id, state)`` pairs and cube dicts."""
+        my_value = self.head_value
+        for pid, player in players:
+            if pid == self.player_id or not player['alive']:
+                continue
+            ox, _, oz = player['position']
+            if math.hypot(ox - self.x, oz - self.z) < VIEW_DISTANCE:
+                if player['head_value'] * 1.5 < my_value:
+                    self.target = (ox, oz)
+                    return
+                if player['head_value'] > my_value * 1.5:
+                    self.target = (2 * self.x - ox, 2 * self.z - oz)
+                    return
+
+        # Default: nearest cube we are allowed to eat
+        best, best_d = None, None
+        for cube in cubes:
+            if not rules.can_collect(my_value, cube['value']):
+                continue
+            cx, _, cz = cube['position']
+            d = (cx - self.x) ** 2 + (cz - self.z) ** 2
+            if best_d is None or d < best_d:
+                best, best_d = (cx, cz), d
+        self.target = best
+
+    def step(self, dt):
+        if not self.alive:
+            self.respawn_timer -= dt
+            if self.respawn_timer <= 0:
+                self.respawn()
+            return
+
+        target = self.target
+        edge = self.limit - WALL_MARGIN
+        if abs(self.x) > edge or abs(self.z) > edge:
+            target = (0.0, 0.0)
+        if target is not None:
+            tx, tz = target[0] - self.x, target[1] - self.z
+            length = math.hypot(tx, tz)
+            if length > 1e-6:
+                blend = min(1.0, TURN_RATE * dt)
+                dx = self.dx + (tx / length - self.dx) * blend
+                dz = self.dz + (tz / length - self.dz) * blend
+                norm = math.hypot(dx, dz) or 1.0
+                self.dx, self.dz = dx / norm, dz / norm
+
+        # Move head and let the body follow the trail, like the client Snake
+        self.prev_position = self.position
+        self.trail.appendleft(self.prev_position)
+        self.x += self.dx * BOT_SPEED * dt
+        self.z += self.dz * BOT_SPEED * dt
+        stride = BOT_SPEED * dt
+        self.segments = [[self.x, 0.5, self.z, self.values[0]]]
+        for i in range(1, len(self.values)):
+            idx = int(i * SEGMENT_SPACING / stride)
+            if idx < len(self.trail):
+                px, py, pz = self.trail[idx]
+            else:
+                last = self.segments[-1]
+                px, py, pz = (last[0] - self.dx * SEGMENT_SPACING, 0.5,
+                              last[2] - self.dz * SEGMENT_SPACING)
+            self.segments.append([px, py, pz, self.values[i]])
+        max_len = int(len(self.values) * SEGMENT_SPACING / stride) + 10
+        while len(self.trail) > max_len:
+            self.trail.pop()
+
+    def eat(self, value):
+        self.values[0] = rules.value_after_collect(self.values[0], value)
+        self.values.append(value)
+        self.score += value
+
+    def die(self):
+        """Mark the bot dead and return its body as cube dicts to drop."""
+        self.alive = False
+        self.respawn_timer = RESPAWN_DELAY
+        return [{'position': seg[:3], 'value': seg[3]} for seg in self.segments]
+
+    # ------------------------------------------------------------------
+    # Collisions against the server game state
+    # ------------------------------------------------------------------
+    def touched_cube(self, cubes):
+        for cube in cubes:
+            if swept_hit(self.prev_position, self.position, cube['position'], 1.0):
+                return cube
+        return None
+
+    def touched_head(self, players, prev_positions):
+        """First other live player whose head this step ran into."""
+        for pid, player in players:
+            if pid == self.player_id or not player['alive']:
+                continue
+            other = player['position']
+            other_prev = prev_positions.get(pid, other)
+            if swept_pair_hit(self.prev_position, self.position, other_prev, other, 1.0):
+                return pid, player
+        return None
+
+    def to_state(self):
+        return {
+            'position': list(self.position),
+            'direction': [self.dx, 0, self.dz],
+            'head_value': self.head_value,
+            'segments': [list(seg) for seg in self.segments],
+            'alive': self.alive,
+            'bot': True,
+        }
@@ -0,0 +1,231 @@
+"""Chunked storage for collectible cubes.
+
+Cubes are stored as plain data grouped into square chunks laid out from the
+arena's corner. Scene entities are only created for the chunks within a view
+radius of a focus point (normally where the camera is looking) through the
+``materialize``/``dematerialize`` callbacks supplied by the client, so the
+number of scene nodes stays bounded by the view instead of the map size.
+"""
+import math
+import random
+from itertools import count
+
+
+def default_cube_value():
+    return random.choices([2, 4, 8], weights=[0.6, 0.3, 0.1])[0]
+
+
+class CubeData:
+    """Collectible cube stored as plain data."""
+    __slots__ = ('cube_id', 'x', 'y', 'z', 'value', 'entity')
+
+    def __init__(self, cube_id, x, y, z, value):
+        self.cube_id = cube_id
+        self.x = x
+        self.y = y
+        self.z = z
+        self.value = value
+        self.entity = None
+
+    @property
+    def position(self):
+        return (self.x, self.y, self.z)
+
+
+class ChunkedWorld:
+    """Square arena split into chunks that hold cubes as data.
+
+    ``cubes_per_chunk`` is the density for a full chunk and may be fractional;
+    chunks cut by the arena edge get a share proportional to their area.
+    """
+
+    def __init__(self, size, chunk_size, cubes_per_chunk, view_radius=None,
+                 materialize=None, dematerialize=None, value_picker=default_cube_value,
+                 max_loads_per_update=2, on_add=None, on_remove=None):
+        self.half = size / 2
+        self.chunk_size = chunk_size
+        self.cubes_per_chunk = cubes_per_chunk
+        self.view_radius = chunk_size if view_radius is None else view_radius
+        self.materialize = materialize
+        self.dematerialize = dematerialize
+        self.value_picker = value_picker
+        self.max_loads_per_update = max_loads_per_update
+        self.on_add = on_add            # called with each cube added or removed,
+        self.on_remove = on_remove      # e.g. to keep an influence map in sync
+        self.chunks = {}            # (cx, cz) -> list of CubeData
+        self.active = set()         # chunks whose cubes have entities
+        self._pending_loads = []    # chunks waiting to be materialized
+        self._depleted = set()      # chunks below their cube target
+        self._ids = count(1)
+        self._count = 0
+        columns = int(math.ceil(size / chunk_size))
+        self.keys = {(cx, cz) for cx in range(columns) for cz in range(columns)}
+        self.targets = self._apportion()    # key -> cubes kept in that chunk
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for cubes in self.chunks.values():
+            yield from cubes
+
+    def chunk_key(self, x, z):
+        return (math.floor((x + self.half) / self.chunk_size),
+                math.floor((z + self.half) / self.chunk_size))
+
+    def bounds(self, key):
+        """``(x0, z0, x1, z1)`` of a chunk, clamped to the arena."""
+        x0 = key[0] * self.chunk_size - self.half
+        z0 = key[1] * self.chunk_size - self.half
+        return (x0, z0, min(x0 + self.chunk_size, self.half), min(z0 + self.chunk_size, self.half))
+
+    def _apportion(self):
+        """Split the arena's cube count over the chunks by clamped area.
+
+        Largest remainders decide which chunks get the leftover cubes, so the
+        total matches the density exactly and edge chunks are not overfilled.
+        """
+        quotas = {}
+        for key in self.keys:
+            x0, z0, x1, z1 = self.bounds(key)
+            quotas[key] = self.cubes_per_chunk * (x1 - x0) * (z1 - z0) / self.chunk_size ** 2
+        targets = {key: int(quota) for key, quota in quotas.items()}
+        leftover = round(sum(quotas.values())) - sum(targets.values())
+        by_remainder = sorted(self.keys, key=lambda k: (quotas[k] - targets[k], random.random()),
+                              reverse=True)
+        for key in by_remainder[:leftover]:
+            targets[key] += 1
+        return targets
+
+    # ------------------------------------------------------------------
+    # Adding and removing cubes
+    # ------------------------------------------------------------------
+    def add(self, x, z, value=None, y=0.5):
+        cube = CubeData(next(self._ids), x, y, z, value or self.value_picker())
+        key = self.chunk_key(x, z)
+        self.chunks.setdefault(key, []).append(cube)
+        self._count += 1
+        if key in self.active and self.materialize:
+            cube.entity = self.materialize(cube)
+        if self.on_add:
+            self.on_add(cube)
+        return cube
+
+    def remove(self, cube):
+        key = self.chunk_key(cube.x, cube.z)
+        cubes = self.chunks.get(key)
+        if not cubes or cube not in cubes:
+            return False
+        cubes.remove(cube)
+        self._count -= 1
+        if self.on_remove:
+            self.on_remove(cube)
+        if cube.entity is not None:
+            if self.dematerialize:
+                self.dematerialize(cube.entity)
+            cube.entity = None
+        if len(cubes) < self.targets.get(key, 0):
+            self._depleted.add(key)
+        return True
+
+    def populate(self, key):
+        """Batch spawn cubes in one chunk up to its target count."""
+        if key not in self.keys:
+            return
+        cubes = self.chunks.setdefault(key, [])
+        x0, z0, x1, z1 = self.bounds(key)
+        for _ in range(self.targets[key] - len(cubes)):
+            self.add(random.uniform(x0, x1), random.uniform(z0, z1))
+
+    def populate_all(self):
+        for key in self.keys:
+            self.populate(key)
+        self._depleted.clear()
+
+    def refill(self):
+        """Top up depleted chunks, one whole chunk per call."""
+        if self._depleted:
+            key = self._depleted.pop()
+            self.populate(key)
+
+    def clear(self):
+        for cubes in self.chunks.values():
+            for cube in cubes:
+                if cube.entity is not None and self.dematerialize:
+                    self.dematerialize(cube.entity)
+                cube.entity = None
+                if self.on_remove:
+                    self.on_remove(cube)
+        self.chunks.clear()
+        self.active.clear()
+        self._pending_loads.clear()
+        self._depleted.clear()
+        self._count = 0
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def near(self, x, z, radius):
+        """Return cubes in the chunks overlapping a square around ``(x, z)``."""
+        cx0, cz0 = self.chunk_key(x - radius, z - radius)
+        cx1, cz1 = self.chunk_key(x + radius, z + radius)
+        found = []
+        for cx in range(cx0, cx1 + 1):
+            for cz in range(cz0, cz1 + 1):
+                found.extend(self.chunks.get((cx, cz), ()))
+        return found
+
+    def nearest(self, x, z, max_rings=3):
+        """Nearest cube searching chunk rings outwards from ``(x, z)``."""
+        ccx, ccz = self.chunk_key(x, z)
+        best, best_d = None, None
+        for ring in range(max_rings + 1):
+            for cx in range(ccx - ring, ccx + ring + 1):
+                for cz in range(ccz - ring, ccz + ring + 1):
+                    if max(abs(cx - ccx), abs(cz - ccz)) != ring:
+                        continue
+                    for cube in self.chunks.get((cx, cz), ()):
+                        d = (cube.x - x) ** 2 + (cube.z - z) ** 2
+                        if best_d is None or d < best_d:
+                            best, best_d = cube, d
+            # Anything in a further ring is at least ``ring`` chunks away
+            if best is not None and math.sqrt(best_d) <= ring * self.chunk_size:
+                break
+        return best
+
+    # ------------------------------------------------------------------
+    # Entity materialization
+    # ------------------------------------------------------------------
+    def update_focus(self, x, z):
+        """Materialize chunks within ``view_radius`` of ``(x, z)`` and release the rest."""
+        r = self.view_radius
+        cx0, cz0 = self.chunk_key(x - r, z - r)
+        cx1, cz1 = self.chunk_key(x + r, z + r)
+        wanted = set()
+        for cx in range(cx0, cx1 + 1):
+            for cz in range(cz0, cz1 + 1):
+                key = (cx, cz)
+                if key not in self.keys:
+                    continue
+                # Distance from the focus to the nearest point of the chunk
+                bx0, bz0, bx1, bz1 = self.bounds(key)
+                dx = max(bx0 - x, 0, x - bx1)
+                dz = max(bz0 - z, 0, z - bz1)
+                if dx * dx + dz * dz <= r * r:
+                    wanted.add(key)
+        for key in self.active - wanted:
+            self.active.discard(key)
+            for cube in self.chunks.get(key, ()):
+                if cube.entity is not None and self.dematerialize:
+                    self.dematerialize(cube.entity)
+                cube.entity = None
+        self._pending_loads = [k for k in self._pending_loads if k in wanted]
+        for key in wanted - self.active:
+            if key not in self._pending_loads:
+                self._pending_loads.append(key)
+        for _ in range(min(self.max_loads_per_update, len(self._pending_loads))):
+            key = self._pending_loads.pop(0)
+            self.active.add(key)
+            if self.materialize:
+                for cube in self.chunks.get(key, ()):
+                    cube.entity = self.materialize(cube)
@@ -0,0 +1,42 @@
+"""Swept collision tests on the ground plane.
+
+Heads move ``speed * dt`` per step, which at boost speed or with a long frame
+(or a slow server tick) can be larger than the pickup radius. Instead of only
+testing where the head ended up, these helpers test the whole segment the
+head travelled during the step against a circle. Positions are anything
+indexable as ``(x, y, z)``; only x and z are used.
+"""
+
+
+def segment_point_distance_sq(ax, az, bx, bz, px, pz):
+    """Squared distance from point P to the segment AB."""
+    dx = bx - ax
+    dz = bz - az
+    length_sq = dx * dx + dz * dz
+    if length_sq == 0:
+        t = 0.0
+    else:
+        t = ((px - ax) * dx + (pz - az) * dz) / length_sq
+        t = 0.0 if t < 0 else 1.0 if t > 1 else t
+    cx = ax + t * dx - px
+    cz = az + t * dz - pz
+    return cx * cx + cz * cz
+
+
+def swept_hit(start, end, center, radius):
+    """True if a point moving from ``start`` to ``end`` passes within ``radius`` of ``center``."""
+    return segment_point_distance_sq(
+        start[0], start[2], end[0], end[2], center[0], center[2]
+    ) < radius * radius
+
+
+def swept_pair_hit(start, end, other_start, other_end, radius):
+    """Swept test for two moving points, done in the frame of the second one.
+
+    Both points are assumed to move linearly over the same step.
+    """
+    return segment_point_distance_sq(
+        start[0] - other_start[0], start[2] - other_start[2],
+        end[0] - other_end[0], end[2] - other_end[2],
+        0.0, 0.0,
+    ) < radius * radius
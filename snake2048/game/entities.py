@@ -1,4 +1,4 @@
-from ursina import Entity, Text, color
+from ursina import Entity, Text, Vec3, color, lerp
 import random
 
 
@@ -7,35 +7,49 @@ def choose_text_color(base_color):
     brightness = (base_color.r + base_color.g + base_color.b) / 3
     return color.black if brightness > 0.5 else color.white
 
-class SnakeSegment(Entity):
-    """Single segment of a snake with a numeric value."""
-    def __init__(self, position=(0, 0, 0), value=2, player_color=color.blue):
-        super().__init__(
-            model='cube',
-            color=player_color,
-            position=position,
-            scale=1,
-            collider='box'
-        )
+
+def cube_color(value):
+    return color.red if value == 2 else color.green if value == 4 else color.yellow
+
+
+class LabeledCube(Entity):
+    """Cube showing its numeric value; the label is only rebuilt on change."""
+    def __init__(self, position=(0, 0, 0), value=2, base_color=color.white):
+        # Collisions are distance based, so no collider
+        super().__init__(model='cube', color=base_color, position=position, scale=1)
         self.value = value
         self.text_entity = Text(
-            text=str(self.value), parent=self, y=0.6, scale=10,
-            origin=(0, 0), color=choose_text_color(self.color)
+            text=str(value), parent=self, y=0.6, scale=10,
+            origin=(0, 0), color=choose_text_color(base_color)
         )
+        self._label_value = value
+        # Simulation state; ``position`` is the interpolated render position
+        self.sim_position = Vec3(*position)
+        self.prev_sim_position = self.sim_position
+
+    def place(self, position):
+        """Move to ``position`` immediately, without interpolation."""
+        self.sim_position = self.prev_sim_position = Vec3(*position)
+        self.position = self.sim_position
+
+    def interpolate(self, alpha):
+        self.position = lerp(self.prev_sim_position, self.sim_position, alpha)
+
+    def set_value(self, value):
+        self.value = value
+        if value != self._label_value:
+            self._label_value = value
+            self.text_entity.text = str(value)
 
-class CollectibleCube(Entity):
+
+class SnakeSegment(LabeledCube):
+    """Single segment of a snake with a numeric value."""
+    def __init__(self, position=(0, 0, 0), value=2, player_color=color.blue):
+        super().__init__(position=position, value=value, base_color=player_color)
+
+
+class CollectibleCube(LabeledCube):
     """Cube that can be collected by snakes."""
     def __init__(self, position=(0, 0, 0), value=2, cube_id=None):
-        super().__init__(
-            model='cube',
-            color=color.red if value == 2 else color.green if value == 4 else color.yellow,
-            position=position,
-            scale=1,
-            collider='box'
-        )
-        self.value = value
+        super().__init__(position=position, value=value, base_color=cube_color(value))
         self.cube_id = cube_id or random.randint(1000, 9999)
-        self.text_entity = Text(
-            text=str(self.value), parent=self, y=0.6, scale=10,
-            origin=(0, 0), color=choose_text_color(self.color)
-        )
@@ -0,0 +1,154 @@
+"""Coarse grid influence map shared by all bots.
+
+The arena is split into square cells holding the cube values, snake body
+values and snake heads found in them. Cubes are added and removed as they
+spawn and get eaten, and each snake is re-stamped once per tick, touching only
+the cells whose contents changed. A bot then samples the cells around its head
+instead of scanning every snake and cube, so its cost depends on the sampling
+radius rather than on the number of entities.
+"""
+import math
+
+FOOD_WEIGHT = 1.0       # pull per point of cube or edible body value
+THREAT_WEIGHT = 40.0    # push away from bigger bodies and equal or bigger heads
+PREY_WEIGHT = 40.0      # pull towards heads much smaller than ours
+
+
+class InfluenceMap:
+    """Per cell cube, body and head values, sampled by bots to steer."""
+
+    def __init__(self, cell_size=5):
+        self.cell_size = cell_size
+        self.food = {}      # cell -> {cube value: count}
+        self.bodies = {}    # cell -> {snake key: biggest segment value there}
+        self.heads = {}     # cell -> {snake key: head value}
+        self._snakes = {}   # snake key -> (head cell, {cell: value})
+
+    def cell(self, x, z):
+        return (math.floor(x / self.cell_size), math.floor(z / self.cell_size))
+
+    def clear(self):
+        self.food.clear()
+        self.bodies.clear()
+        self.heads.clear()
+        self._snakes.clear()
+
+    # ------------------------------------------------------------------
+    # Cubes (hooked to ChunkedWorld add/remove)
+    # ------------------------------------------------------------------
+    def add_cube(self, cube):
+        values = self.food.setdefault(self.cell(cube.x, cube.z), {})
+        values[cube.value] = values.get(cube.value, 0) + 1
+
+    def remove_cube(self, cube):
+        key = self.cell(cube.x, cube.z)
+        values = self.food.get(key)
+        if not values or cube.value not in values:
+            return
+        values[cube.value] -= 1
+        if not values[cube.value]:
+            del values[cube.value]
+        if not values:
+            del self.food[key]
+
+    # ------------------------------------------------------------------
+    # Snakes (re-stamped once per tick)
+    # ------------------------------------------------------------------
+    def update_snake(self, key, head, body):
+        """Stamp a snake from its ``head`` and ``body`` ``(x, z, value)`` tuples."""
+        head_cell = self.cell(head[0], head[1])
+        cells = {}
+        for x, z, value in body:
+            c = self.cell(x, z)
+            if value > cells.get(c, 0):
+                cells[c] = value
+        old_head, old_cells = self._snakes.get(key, (None, {}))
+        for c, value in old_cells.items():
+            if cells.get(c) != value:
+                _discard(self.bodies, c, key)
+        for c, value in cells.items():
+            if old_cells.get(c) != value:
+                self.bodies.setdefault(c, {})[key] = value
+        if old_head is not None:
+            _discard(self.heads, old_head, key)
+        self.heads.setdefault(head_cell, {})[key] = head[2]
+        self._snakes[key] = (head_cell, cells)
+
+    def remove_snake(self, key):
+        entry = self._snakes.pop(key, None)
+        if entry is None:
+            return
+        head_cell, cells = entry
+        _discard(self.heads, head_cell, key)
+        for c in cells:
+            _discard(self.bodies, c, key)
+
+    # ------------------------------------------------------------------
+    # Sampling
+    # ------------------------------------------------------------------
+    def steer(self, x, z, value, radius, key=None, hunt_ratio=1.5, flee_ratio=1.5):
+        """Sum the pull and push of the cells within ``radius`` of ``(x, z)``.
+
+        Returns ``(dx, dz, threatened, hunting)``: an unnormalized steering
+        vector, whether a much bigger head is near and whether a much smaller
+        head is near. Nearer cells weigh more, so a bot heading for food bends
+        around stronger snakes on the way.
+        """
+        size = self.cell_size
+        ccx, ccz = self.cell(x, z)
+        r = int(math.ceil(radius / size))
+        dx = dz = 0.0
+        threatened = hunting = False
+        for cx in range(ccx - r, ccx + r + 1):
+            for cz in range(ccz - r, ccz + r + 1):
+                c = (cx, cz)
+                food = self.food.get(c)
+                bodies = self.bodies.get(c)
+                heads = self.heads.get(c)
+                if not (food or bodies or heads):
+                    continue
+                ox = (cx + 0.5) * size - x
+                oz = (cz + 0.5) * size - z
+                d = math.hypot(ox, oz)
+                if d > radius:
+                    continue
+                pull = 0.0
+                if food:
+                    # Any cube can be eaten; big ones go on the tail and merge
+                    for cube_value, n in food.items():
+                        pull += FOOD_WEIGHT * cube_value * n
+                if bodies:
+                    for other, seg_value in bodies.items():
+                        if other == key:
+                            continue
+                        if seg_value > value:
+                            pull -= THREAT_WEIGHT
+                        else:
+                            pull += FOOD_WEIGHT * seg_value
+                if heads:
+                    for other, head_value in heads.items():
+                        if other == key:
+                            continue
+                        if head_value > value * flee_ratio:
+                            threatened = True
+                            pull -= THREAT_WEIGHT * 2
+                        elif head_value * hunt_ratio < value:
+                            hunting = True
+                            pull += PREY_WEIGHT
+                        elif head_value >= value:
+                            # Equal clashes are decided by update order, not by
+                            # who attacks, so they are not worth the risk
+                            pull -= THREAT_WEIGHT
+                if pull:
+                    weight = pull / (1 + d) / max(d, 1e-6)
+                    dx += ox * weight
+                    dz += oz * weight
+        return dx, dz, threatened, hunting
+
+
+def _discard(grid, cell, key):
+    entries = grid.get(cell)
+    if entries is not None:
+        entries.pop(key, None)
+        if not entries:
+            del grid[cell]
@@ -0,0 +1,29 @@
+from ursina import Entity, Text, camera, color, time
+from ..profiler import profiler as default_profiler
+
+
+class ProfilerOverlay(Entity):
+    """On-screen table of profiler timings, toggled with a key (F3 by default)."""
+    def __init__(self, profiler=default_profiler, toggle_key='f3', refresh_interval=0.25):
+        super().__init__()
+        self.profiler = profiler
+        self.toggle_key = toggle_key
+        self.refresh_interval = refresh_interval
+        self._timer = 0
+        self.label = Text(
+            "", position=(-0.85, 0.3), scale=0.9, font='VeraMono.ttf',
+            color=color.lime, parent=camera.ui, enabled=profiler.enabled
+        )
+
+    def input(self, key):
+        if key == self.toggle_key:
+            self.label.enabled = self.profiler.toggle()
+
+    def update(self):
+        if not self.profiler.enabled:
+            return
+        # Rebuilding text is costly, so refresh a few times per second only
+        self._timer += time.dt
+        if self._timer >= self.refresh_interval:
+            self._timer = 0
+            self.label.text = self.profiler.report()
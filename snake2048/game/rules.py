@@ -0,0 +1,42 @@
+"""Game rules shared by the client, the server and headless tools.
+
+This module, like the other headless modules in this package (bots, chunks,
+collision, influence, timestep), must stay free of Ursina imports so the
+server and the training tools can use it.
+"""
+import random
+
+ARENA_LIMIT = 24            # heads beyond this on x or z leave the arena
+CUBE_VALUES = (2, 4, 8)     # values of freshly spawned cubes
+
+
+def random_cube_value():
+    return random.choice(CUBE_VALUES)
+
+
+def can_collect(head_value, cube_value):
+    """A head can only eat cubes that are not bigger than itself."""
+    return cube_value <= head_value
+
+
+def value_after_collect(head_value, cube_value):
+    """Eating a cube of the same value doubles the head."""
+    return head_value * 2 if cube_value == head_value else head_value
+
+
+def head_clash(value, other_value):
+    """Return ``(dies, other_dies)`` for two heads running into each other."""
+    if value > other_value:
+        return False, True
+    if value < other_value:
+        return True, False
+    return True, True
+
+
+def out_of_arena(x, z, limit=ARENA_LIMIT):
+    return abs(x) > limit or abs(z) > limit
+
+
+def snake_score(segments):
+    """Score of a snake sent as ``[x, y, z, value]`` segments."""
+    return sum(segment[3] for segment in segments)
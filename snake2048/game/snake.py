@@ -1,6 +1,8 @@
-from ursina import Vec3, destroy, distance, held_keys, color, time, invoke
+from ursina import Vec3, destroy, distance, held_keys, color, invoke
 import random
 from .entities import SnakeSegment, CollectibleCube
+from . import rules
+from .collision import swept_hit, swept_pair_hit
 
 # Shared collections for cubes and non-local snakes
 collectible_cubes = []
@@ -23,29 +25,34 @@ class Snake:
         self.segments.append(self.head)
         self.speed = 5
         self.direction = Vec3(0, 0, 1)
+        self.prev_head_position = self.head.sim_position
         self.position_history = []
         self.segment_spacing = 1.0
         self.alive = True
         self.score = 0
 
-    def update(self):
+    def step(self, dt):
+        """Advance the simulation by one fixed step of ``dt`` seconds."""
         if not self.alive:
             return
+        for segment in self.segments:
+            segment.prev_sim_position = segment.sim_position
         # Save head position history
-        self.position_history.insert(0, self.head.position)
+        self.prev_head_position = self.head.sim_position
+        self.position_history.insert(0, self.head.sim_position)
         # Move head
-        self.head.position += self.direction * time.dt * self.speed
+        self.head.sim_position = self.head.sim_position + self.direction * dt * self.speed
 
         # Move segments using stored history
         for i in range(1, len(self.segments)):
-            target_idx = int(i * self.segment_spacing / (self.speed * time.dt))
+            target_idx = int(i * self.segment_spacing / (self.speed * dt))
             if target_idx < len(self.position_history):
-                self.segments[i].position = self.position_history[target_idx]
+                self.segments[i].sim_position = self.position_history[target_idx]
             else:
-                self.segments[i].position = (
-                    self.segments[i-1].position - self.direction * self.segment_spacing
+                self.segments[i].sim_position = (
+                    self.segments[i-1].sim_position - self.direction * self.segment_spacing
                 )
-        max_len = int(len(self.segments) * self.segment_spacing / (self.speed * time.dt)) + 10
+        max_len = int(len(self.segments) * self.segment_spacing / (self.speed * dt)) + 10
         if len(self.position_history) > max_len:
             self.position_history = self.position_history[:max_len]
 
@@ -60,9 +67,16 @@ class Snake:
             if held_keys['d'] and self.direction != Vec3(-1, 0, 0):
                 self.direction = Vec3(1, 0, 0)
 
+    def render(self, alpha):
+        """Place segment entities between the last two simulated states."""
+        if not self.alive:
+            return
+        for segment in self.segments:
+            segment.interpolate(alpha)
+
     def grow(self, value: int):
         new_segment = SnakeSegment(
-            position=self.segments[-1].position,
+            position=self.segments[-1].sim_position,
             value=value,
             player_color=self.player_color,
         )
@@ -71,10 +85,8 @@ class Snake:
 
     def collect_cube(self, cube: CollectibleCube, websocket_client=None):
         """Collect cube if value is valid and notify server."""
-        if cube.value <= self.head.value:
-            if cube.value == self.head.value:
-                self.head.value *= 2
-                self.head.text_entity.text = str(self.head.value)
+        if rules.can_collect(self.head.value, cube.value):
+            self.head.set_value(rules.value_after_collect(self.head.value, cube.value))
             self.grow(cube.value)
             collectible_cubes.remove(cube)
             destroy(cube)
@@ -88,14 +100,16 @@ class Snake:
             return
         for other_snake in other_snakes:
             if other_snake.player_id != self.player_id and other_snake.alive:
-                if distance(self.head.position, other_snake.head.position) < 1.0:
-                    if self.head.value > other_snake.head.value:
-                        other_snake.die(websocket_client)
-                    elif self.head.value < other_snake.head.value:
-                        self.die(websocket_client)
-                    else:
-                        self.die(websocket_client)
-                        other_snake.die(websocket_client)
+                if swept_pair_hit(self.prev_head_position, self.head.sim_position,
+                                  other_snake.prev_head_position, other_snake.head.sim_position, 1.0):
+                    # Only report clashes our own snake took part in
+                    involved = "local_player" in (self.player_id, other_snake.player_id)
+                    client = websocket_client if involved else None
+                    dies, other_dies = rules.head_clash(self.head.value, other_snake.head.value)
+                    if dies:
+                        self.die(client)
+                    if other_dies:
+                        other_snake.die(client)
 
     def die(self, websocket_client=None):
         self.alive = False
@@ -109,15 +123,16 @@ class Snake:
     def check_collision(self, websocket_client=None):
         if not self.alive:
             return
-        if abs(self.head.x) > 24 or abs(self.head.z) > 24:
+        head = self.head.sim_position
+        if rules.out_of_arena(head.x, head.z):
             self.die(websocket_client)
         for i in range(1, len(self.segments)):
-            if distance(self.head.position, self.segments[i].position) < 0.8:
+            if distance(head, self.segments[i].sim_position) < 0.8:
                 self.die(websocket_client)
         if self.player_id == "local_player":
             for cube in collectible_cubes[:]:
-                if distance(self.head.position, cube.position) < 1.0:
-                    if cube.value <= self.head.value:
+                if swept_hit(self.prev_head_position, head, cube.position, 1.0):
+                    if rules.can_collect(self.head.value, cube.value):
                         self.collect_cube(cube, websocket_client)
                     else:
                         self.die(websocket_client)
@@ -129,7 +144,7 @@ def spawn_collectible_cube(position=None, value=None, cube_id=None):
         x = random.uniform(-20, 20)
         z = random.uniform(-20, 20)
         position = (x, 0.5, z)
-    value = value or random.choice([2, 4, 8])
+    value = value or rules.random_cube_value()
     cube = CollectibleCube(position=position, value=value, cube_id=cube_id)
     collectible_cubes.append(cube)
     return cube
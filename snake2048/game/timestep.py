@@ -0,0 +1,37 @@
+"""Fixed-timestep accumulator decoupling simulation from the frame rate.
+
+The render loop feeds the frame time into :meth:`FixedTimestep.advance`, runs
+the returned number of simulation steps of ``dt`` seconds each and then
+renders entities interpolated by :attr:`FixedTimestep.alpha` between the last
+two simulated states. Simulation cost is bounded by ``rate`` steps per second
+and behaves the same on every machine.
+"""
+
+SIM_RATE = 30           # simulation steps per second
+MAX_STEPS_PER_FRAME = 5  # drop backlog after long stalls instead of spiralling
+
+
+class FixedTimestep:
+    def __init__(self, rate=SIM_RATE, max_steps=MAX_STEPS_PER_FRAME):
+        self.dt = 1 / rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, frame_dt):
+        """Add a frame's time and return how many steps to simulate."""
+        self.accumulator += frame_dt
+        steps = int(self.accumulator / self.dt)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.dt
+        return steps
+
+    @property
+    def alpha(self):
+        """Fraction of a step elapsed since the last simulated state."""
+        return min(self.accumulator / self.dt, 1.0)
+
+    def reset(self):
+        self.accumulator = 0.0
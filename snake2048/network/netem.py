@@ -0,0 +1,157 @@
+"""Local WebSocket proxy that impairs traffic between clients and a server.
+
+Each direction of every proxied connection gets configurable latency, jitter,
+bandwidth cap, message loss and reordering, so client behaviour under poor
+networks can be tested without an outside service.
+
+    python -m snake2048.network.netem --latency 120 --jitter 40 --loss 0.03
+    # then point the client at ws://localhost:8764
+"""
+import argparse
+import asyncio
+import random
+import websockets
+
+
+class Impairment:
+    """Network conditions for one direction of a link."""
+
+    def __init__(self, latency=0.0, jitter=0.0, loss=0.0, reorder=0.0, bandwidth=None):
+        self.latency = latency      # seconds
+        self.jitter = jitter        # seconds, uniform +/- around latency
+        self.loss = loss            # probability a message is dropped
+        self.reorder = reorder      # probability a message is held back behind later ones
+        self.bandwidth = bandwidth  # bytes per second, None for unlimited
+
+    def __repr__(self):
+        return (f"Impairment(latency={self.latency}, jitter={self.jitter}, loss={self.loss}, "
+                f"reorder={self.reorder}, bandwidth={self.bandwidth})")
+
+
+class LinkStats:
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.reordered = 0
+
+
+class ImpairedLink:
+    """Delivers messages for one direction after applying an Impairment."""
+
+    def __init__(self, impairment, deliver):
+        self.impairment = impairment
+        self.deliver = deliver          # coroutine function taking the message
+        self.stats = LinkStats()
+        self._wire_free_at = 0.0        # when the bandwidth cap frees the link
+        self._last_delivery = 0.0       # keeps in-order delivery unless reordering
+        self._tasks = set()
+
+    def submit(self, message):
+        imp = self.impairment
+        if imp.loss and random.random() < imp.loss:
+            self.stats.dropped += 1
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        size = len(message)
+        sent_at = now
+        if imp.bandwidth:
+            sent_at = max(now, self._wire_free_at) + size / imp.bandwidth
+            self._wire_free_at = sent_at
+        deliver_at = sent_at + max(0.0, imp.latency + random.uniform(-imp.jitter, imp.jitter))
+        if imp.reorder and random.random() < imp.reorder:
+            # Hold this one back so the next messages overtake it
+            deliver_at += imp.latency + 2 * imp.jitter + 0.05
+            self.stats.reordered += 1
+        else:
+            deliver_at = max(deliver_at, self._last_delivery)
+            self._last_delivery = deliver_at
+        task = loop.create_task(self._deliver_later(message, deliver_at - now))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver_later(self, message, delay):
+        await asyncio.sleep(delay)
+        try:
+            await self.deliver(message)
+        except websockets.exceptions.ConnectionClosed:
+            return
+        self.stats.messages += 1
+        self.stats.bytes += len(message)
+
+    def close(self):
+        for task in self._tasks:
+            task.cancel()
+
+
+class ImpairmentProxy:
+    """Forwards every client connection to ``upstream`` through impaired links."""
+
+    def __init__(self, upstream='ws://localhost:8765', host='localhost', port=8764,
+                 uplink=None, downlink=None):
+        self.upstream = upstream
+        self.host = host
+        self.port = port
+        self.uplink = uplink or Impairment()        # client -> server
+        self.downlink = downlink or Impairment()    # server -> client
+        self.connections = []                       # (up, down) links per connection
+
+    async def handler(self, client, path):
+        async with websockets.connect(self.upstream.rstrip('/') + path) as server:
+            up = ImpairedLink(self.uplink, server.send)
+            down = ImpairedLink(self.downlink, client.send)
+            self.connections.append((up, down))
+            pumps = [asyncio.ensure_future(self._pump(client, up)),
+                     asyncio.ensure_future(self._pump(server, down))]
+            try:
+                # Either side closing ends the proxied connection
+                await asyncio.wait(pumps, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for pump in pumps:
+                    pump.cancel()
+                up.close()
+                down.close()
+
+    async def _pump(self, source, link):
+        try:
+            async for message in source:
+                link.submit(message)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def run(self):
+        async with websockets.serve(self.handler, self.host, self.port):
+            print(f"Impairment proxy {self.host}:{self.port} -> {self.upstream} "
+                  f"up={self.uplink} down={self.downlink}")
+            await asyncio.Future()  # Run forever
+
+
+def impairment_from_args(args):
+    return Impairment(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        loss=args.loss,
+        reorder=args.reorder,
+        bandwidth=args.bandwidth * 1000 / 8 if args.bandwidth else None,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency/jitter/loss proxy for the game server")
+    parser.add_argument('--upstream', default='ws://localhost:8765')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8764)
+    parser.add_argument('--latency', type=float, default=0, help="one-way latency in ms")
+    parser.add_argument('--jitter', type=float, default=0, help="jitter in ms")
+    parser.add_argument('--loss', type=float, default=0, help="drop probability per message")
+    parser.add_argument('--reorder', type=float, default=0, help="reorder probability per message")
+    parser.add_argument('--bandwidth', type=float, default=0, help="cap in kbit/s, 0 for none")
+    args = parser.parse_args()
+    impairment = impairment_from_args(args)
+    proxy = ImpairmentProxy(args.upstream, args.host, args.port, impairment, impairment)
+    asyncio.run(proxy.run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Persistence of kills, deaths and final scores in a local SQLite database.
+
+The game tick only puts small tuples on a queue. A background thread owns the
+write connection and commits whatever has queued up in one transaction per
+batch, so recording thousands of events per minute never blocks the tick.
+Score queries use their own connection and an index on ``score``.
+"""
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,         -- 'kill' or 'death'
+    player_id TEXT NOT NULL,    -- killer for kills, victim for deaths
+    other_id TEXT,              -- victim for kills, killer for deaths
+    value INTEGER
+);
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    player_id TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    bot INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC);
+CREATE INDEX IF NOT EXISTS scores_by_bot_score ON scores (bot, score DESC);
+CREATE INDEX IF NOT EXISTS events_by_player ON events (player_id, kind);
+"""
+
+_EVENT_SQL = "INSERT INTO events (ts, kind, player_id, other_id, value) VALUES (?, ?, ?, ?, ?)"
+_SCORE_SQL = "INSERT INTO scores (ts, player_id, score, bot) VALUES (?, ?, ?, ?)"
+_STOP = object()
+
+
+def _connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")     # readers do not block the writer
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ScoreStore:
+    """Batched, asynchronous writer plus indexed score queries."""
+
+    def __init__(self, path='snake2048.db', batch_size=500, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        conn = _connect(path)
+        conn.executescript(SCHEMA)
+        conn.close()
+        self._thread = threading.Thread(target=self._writer, name='score-writer', daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Recording (called from the game loop, never blocks)
+    # ------------------------------------------------------------------
+    def record_kill(self, killer_id, victim_id, value=0):
+        self._queue.put((_EVENT_SQL, (time.time(), 'kill', killer_id, victim_id, value)))
+
+    def record_death(self, player_id, killer_id=None, score=0):
+        self._queue.put((_EVENT_SQL, (time.time(), 'death', player_id, killer_id, score)))
+
+    def record_score(self, player_id, score, bot=False):
+        self._queue.put((_SCORE_SQL, (time.time(), player_id, score, int(bot))))
+
+    # ------------------------------------------------------------------
+    # Background writer
+    # ------------------------------------------------------------------
+    def _writer(self):
+        conn = _connect(self.path)
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if batch:
+                self._write_batch(conn, batch)
+        conn.close()
+
+    @staticmethod
+    def _write_batch(conn, batch):
+        grouped = {}
+        for sql, params in batch:
+            grouped.setdefault(sql, []).append(params)
+        try:
+            with conn:  # one transaction per batch
+                for sql, rows in grouped.items():
+                    conn.executemany(sql, rows)
+        except sqlite3.Error as exc:
+            print(f"Failed to store {len(batch)} score records: {exc}")
+
+    def close(self):
+        """Flush everything queued so far and stop the writer thread."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def top_scores(self, limit=10, include_bots=False):
+        """All-time best ``(player_id, score, ts)`` rows, served by the score indexes."""
+        sql = "SELECT player_id, score, ts FROM scores"
+        if not include_bots:
+            sql += " WHERE bot = 0"
+        sql += " ORDER BY score DESC LIMIT ?"
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute(sql, (limit,)).fetchall()
+        finally:
+            conn.close()
+
+    def kill_count(self, player_id):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute(
+                "SELECT COUNT(*) FROM events WHERE player_id = ? AND kind = 'kill'", (player_id,)
+            ).fetchone()[0]
+        finally:
+            conn.close()
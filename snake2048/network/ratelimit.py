@@ -0,0 +1,90 @@
+"""Per-connection inbound limits for the game server.
+
+Every connection gets a token bucket per message type. ``player_state``
+messages over the limit are not dropped but coalesced by the server, which
+keeps only the newest one and applies it on its next tick.
+"""
+import math
+import time
+from collections import Counter
+
+MAX_MESSAGE_BYTES = 64 * 1024   # websockets max_size; larger frames never get buffered
+MAX_SEGMENTS = 1024             # longest snake a player_state may describe
+
+# message type -> (tokens per second, burst size)
+DEFAULT_LIMITS = {
+    'player_connect': (1, 2),
+    'player_state': (15, 5),    # clients send 10 per second
+    'collect_cube': (10, 10),
+    'player_death': (1, 3),
+}
+UNKNOWN_TYPE_LIMIT = (2, 5)
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+
+    def consume(self, tokens=1):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+
+class ConnectionLimiter:
+    """Token buckets for one connection, keyed by message type."""
+
+    def __init__(self, limits=DEFAULT_LIMITS, clock=time.monotonic):
+        self.limits = limits
+        self.clock = clock
+        self.buckets = {}
+        self.rejected = Counter()   # reason -> count, for logging
+
+    def allow(self, message_type):
+        # Unknown types share one bucket so made-up names cannot dodge it
+        key = message_type if message_type in self.limits else None
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            rate, burst = self.limits.get(key, UNKNOWN_TYPE_LIMIT)
+            bucket = self.buckets[key] = TokenBucket(rate, burst, self.clock)
+        if bucket.consume():
+            return True
+        self.rejected[key or 'unknown'] += 1
+        return False
+
+    def check_size(self, message):
+        if len(message) > MAX_MESSAGE_BYTES:
+            self.rejected['oversized'] += 1
+            return False
+        return True
+
+
+def _is_number(value):
+    # bool is an int subclass but never a coordinate
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value))
+
+
+def _is_vector(value, size):
+    return isinstance(value, list) and len(value) == size and all(_is_number(v) for v in value)
+
+
+def valid_player_state(data):
+    """Shape and type checks before a player_state touches the game state."""
+    head_value = data.get('head_value')
+    if not isinstance(head_value, int) or isinstance(head_value, bool) or head_value <= 0:
+        return False
+    if not (_is_vector(data.get('position'), 3) and _is_vector(data.get('direction'), 3)):
+        return False
+    segments = data.get('segments')
+    if not isinstance(segments, list) or not 0 < len(segments) <= MAX_SEGMENTS:
+        return False
+    return all(_is_vector(segment, 4) for segment in segments)
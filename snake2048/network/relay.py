@@ -0,0 +1,65 @@
+"""Spectator relay: subscribes to a room once and re-broadcasts it.
+
+The relay connects to a game server's spectator endpoint and forwards every
+snapshot, as the exact same bytes and without decoding it, to all of its own
+spectators. Relays can subscribe to other relays, so spectator count scales
+with the number of relay processes instead of the game server's CPU.
+
+    python -m snake2048.network.relay --upstream ws://localhost:8765/spectate --port 8766
+"""
+import argparse
+import asyncio
+import websockets
+
+from .server import SPECTATE_PATH
+
+
+class SpectatorRelay:
+    def __init__(self, upstream=f"ws://localhost:8765{SPECTATE_PATH}", host='0.0.0.0', port=8766):
+        self.upstream = upstream
+        self.host = host
+        self.port = port
+        self.spectators = set()
+        self.latest = None          # last snapshot, sent to spectators on join
+        self.reconnect_delay = 5
+
+    async def handler(self, websocket, _):
+        self.spectators.add(websocket)
+        try:
+            if self.latest is not None:
+                await websocket.send(self.latest)
+            async for _ in websocket:
+                pass  # spectators have nothing to say
+        finally:
+            self.spectators.discard(websocket)
+
+    async def subscribe(self):
+        while True:
+            try:
+                async with websockets.connect(self.upstream) as upstream:
+                    async for message in upstream:
+                        self.latest = message
+                        if self.spectators:
+                            websockets.broadcast(self.spectators, message)
+            except Exception as exc:
+                print(f"Relay upstream error: {exc}. Reconnecting in {self.reconnect_delay}s")
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def run(self):
+        async with websockets.serve(self.handler, self.host, self.port):
+            print(f"Relay for {self.upstream} started on {self.host}:{self.port}")
+            await self.subscribe()  # Run forever
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snake 2048 spectator relay")
+    parser.add_argument('--upstream', default=f"ws://localhost:8765{SPECTATE_PATH}",
+                        help="spectator endpoint of a game server or another relay")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8766)
+    args = parser.parse_args()
+    asyncio.run(SpectatorRelay(args.upstream, args.host, args.port).run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Scripted network scenarios run against a local server through the proxy.
+
+For every scenario a GameServer (with bots, so state flows every tick) and an
+ImpairmentProxy are started in-process, then several headless clients built
+on WebSocketClient connect through the proxy and play like ``main.py`` does.
+Per client the runner reports how stale snapshots are on arrival, the largest
+gap between updates and bandwidth in each direction.
+
+    python -m snake2048.network.scenario --scenario mobile --clients 4 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+import websockets
+
+from ..profiler import percentile
+from .client import WebSocketClient
+from .netem import Impairment, ImpairmentProxy
+from .server import GameServer
+
+SEND_INTERVAL = 0.1     # same rate as main.py's send_state_loop
+
+PRESETS = {
+    'lan': Impairment(latency=0.001),
+    'broadband': Impairment(latency=0.025, jitter=0.005),
+    'wifi': Impairment(latency=0.04, jitter=0.02, loss=0.01),
+    'mobile': Impairment(latency=0.12, jitter=0.05, loss=0.03, reorder=0.02, bandwidth=64_000),
+    'congested': Impairment(latency=0.25, jitter=0.1, loss=0.08, reorder=0.05, bandwidth=16_000),
+}
+
+
+class ProbeClient(WebSocketClient):
+    """Headless player that records when and how much state arrives."""
+
+    def __init__(self, uri, index):
+        super().__init__(uri)
+        self.index = index
+        self.reconnect_delay = 1
+        self.updates = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.staleness = []     # seconds between server encode and arrival
+        self.gaps = []          # seconds between consecutive arrivals
+        self._last_arrival = None
+        self.set_receive_callback(self.on_state)
+
+    async def _receive_loop(self):
+        try:
+            async for message in self.websocket:
+                self.bytes_in += len(message)
+                await self.receive_callback(json.loads(message))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def on_state(self, data):
+        if data.get('type') != 'game_state_update':
+            return
+        now = time.time()
+        self.updates += 1
+        if 'server_time' in data:
+            self.staleness.append(now - data['server_time'])
+        if self._last_arrival is not None:
+            self.gaps.append(now - self._last_arrival)
+        self._last_arrival = now
+
+    async def play(self):
+        """Circle the arena sending player_state like the real client."""
+        angle = self.index
+        while True:
+            if self.websocket and self.websocket.open:
+                angle += SEND_INTERVAL
+                x, z = 10 * math.cos(angle), 10 * math.sin(angle)
+                payload = {
+                    'type': 'player_state',
+                    'position': [x, 0.5, z],
+                    'direction': [-math.sin(angle), 0, math.cos(angle)],
+                    'head_value': 2,
+                    'segments': [[x, 0.5, z, 2]],
+                }
+                self.bytes_out += len(json.dumps(payload))
+                await self.send(payload)
+            await asyncio.sleep(SEND_INTERVAL)
+
+    def report(self, duration):
+        stale = sorted(self.staleness)
+        gaps = sorted(self.gaps)
+        return {
+            'client': self.index,
+            'updates_per_s': self.updates / duration,
+            'stale_p50_ms': percentile(stale, 0.50) * 1000,
+            'stale_p95_ms': percentile(stale, 0.95) * 1000,
+            'stale_max_ms': (stale[-1] if stale else 0) * 1000,
+            'gap_max_ms': (gaps[-1] if gaps else 0) * 1000,
+            'down_kBps': self.bytes_in / duration / 1000,
+            'up_kBps': self.bytes_out / duration / 1000,
+        }
+
+
+async def run_scenario(impairment, clients=4, duration=10.0, bots=4, port=8775):
+    """Run one scenario and return per client reports plus proxy totals."""
+    server = GameServer('localhost', port, bot_fill=clients + bots)
+    proxy = ImpairmentProxy(f"ws://localhost:{port}", 'localhost', port + 1,
+                            uplink=impairment, downlink=impairment)
+    tasks = [asyncio.ensure_future(server.run()), asyncio.ensure_future(proxy.run())]
+    await asyncio.sleep(0.5)  # let both sockets open
+    probes = [ProbeClient(f"ws://localhost:{port + 1}", i) for i in range(clients)]
+    tasks += [asyncio.ensure_future(p.run(p.play())) for p in probes]
+    await asyncio.sleep(duration)
+    for probe in probes:
+        probe.running = False
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    links = [link for pair in proxy.connections for link in pair]
+    totals = {
+        'dropped': sum(link.stats.dropped for link in links),
+        'reordered': sum(link.stats.reordered for link in links),
+    }
+    return [p.report(duration) for p in probes], totals
+
+
+def print_report(name, reports, totals):
+    print(f"\n== {name}: dropped {totals['dropped']}, reordered {totals['reordered']}")
+    columns = ['client', 'updates_per_s', 'stale_p50_ms', 'stale_p95_ms', 'stale_max_ms',
+               'gap_max_ms', 'down_kBps', 'up_kBps']
+    print("".join(f"{c:>14}" for c in columns))
+    for report in reports:
+        print("".join(
+            f"{report[c]:>14.1f}" if isinstance(report[c], float) else f"{report[c]:>14}"
+            for c in columns
+        ))
+
+
+async def run_all(names, clients, duration, bots, port):
+    for name in names:
+        reports, totals = await run_scenario(PRESETS[name], clients, duration, bots, port)
+        print_report(name, reports, totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run network scenarios through the impairment proxy")
+    parser.add_argument('--scenario', action='append', choices=sorted(PRESETS),
+                        help="scenario to run, may be repeated (default: all)")
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--bots', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument('--port', type=int, default=8775,
+                        help="server port; the proxy uses the next one")
+    args = parser.parse_args()
+    names = args.scenario or list(PRESETS)
+    asyncio.run(run_all(names, args.clients, args.duration, args.bots, args.port))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,49 @@
+import argparse
 import asyncio
 import json
+import math
 import websockets
 import random
+import time
+from itertools import count
+
+from ..game import rules
+from ..game.bots import HeadlessBot
+from .persistence import ScoreStore
+from .ratelimit import MAX_MESSAGE_BYTES, ConnectionLimiter, valid_player_state
+
+TICK_RATE = 20      # server simulation steps per second
+CUBE_TARGET = 20    # collectible cubes kept in the arena
+CUBE_SPAWN_RANGE = 20
+SPECTATE_PATH = '/spectate'
+KILL_CLAIM_RANGE = 2.0  # combat radius plus slack for the client's send interval
+
 
 class GameServer:
-    def __init__(self, host='0.0.0.0', port=8765):
+    def __init__(self, host='0.0.0.0', port=8765, bot_fill=0, tick_rate=TICK_RATE,
+                 cube_target=CUBE_TARGET, store=None):
         self.host = host
         self.port = port
         self.clients = {}
+        self.spectators = set()
+        self.bots = {}
+        self.pending_states = {}    # player_id -> newest rate limited player_state
+        self.state_dirty = False    # handlers changed the state; sent on the next tick
+        self.bot_fill = bot_fill    # keep at least this many players by adding bots
+        self.tick_rate = tick_rate
+        self.cube_target = cube_target
+        self.store = store          # optional ScoreStore for kills, deaths and scores
+        self._bot_ids = count(1)
+        self._cube_ids = count(1)
         self.game_state = {
             'players': {},
             'collectible_cubes': []
         }
 
-    async def handler(self, websocket, _):
+    async def handler(self, websocket, path):
+        if path == SPECTATE_PATH:
+            await self.spectator_handler(websocket)
+            return
         player_id = str(random.randint(1000, 9999))
         self.clients[player_id] = websocket
         self.game_state['players'][player_id] = {
@@ -23,41 +53,287 @@ class GameServer:
             'segments': [[0,0,0,2]],
             'alive': True
         }
+        limiter = ConnectionLimiter()
+        self.state_dirty = True
         try:
-            await self.send_state()
             async for msg in websocket:
-                data = json.loads(msg)
-                if data['type'] == 'player_state':
-                    self.game_state['players'][player_id].update({
-                        'position': data['position'],
-                        'direction': data['direction'],
-                        'head_value': data['head_value'],
-                        'segments': data['segments'],
-                        'alive': True
-                    })
-                elif data['type'] == 'collect_cube':
+                # Second guard behind max_size, before paying for JSON parsing
+                if not limiter.check_size(msg):
+                    continue
+                try:
+                    data = json.loads(msg)
+                    kind = data['type']
+                except (ValueError, TypeError, KeyError):
+                    continue
+                if not isinstance(kind, str):
+                    continue
+                if kind == 'player_state':
+                    if not valid_player_state(data):
+                        continue
+                    if not limiter.allow(kind):
+                        # Over the limit: keep only the newest, applied next tick
+                        self.pending_states[player_id] = data
+                        continue
+                    self.pending_states.pop(player_id, None)
+                    self.apply_player_state(player_id, data)
+                elif not limiter.allow(kind):
+                    continue
+                elif kind == 'collect_cube':
                     self.game_state['collectible_cubes'] = [
-                        c for c in self.game_state['collectible_cubes'] if c['id'] != data['cube_id']
+                        c for c in self.game_state['collectible_cubes'] if c['id'] != data.get('cube_id')
                     ]
-                elif data['type'] == 'player_death':
-                    self.game_state['players'][player_id]['alive'] = False
-                await self.send_state()
+                elif kind == 'player_death':
+                    dead_id = data.get('id')
+                    if dead_id in (None, 'local_player'):
+                        self.player_died(player_id)
+                    elif isinstance(dead_id, str) and dead_id in self.bots:
+                        # The client claims its snake beat one of our bots
+                        bot = self.bots[dead_id]
+                        if self.can_claim_kill(player_id, bot):
+                            self.kill_bot(bot, killer_id=player_id)
+                    else:
+                        # Other humans report their own deaths
+                        continue
+                else:
+                    continue
+                self.state_dirty = True
         finally:
             self.clients.pop(player_id, None)
+            self.pending_states.pop(player_id, None)
+            if self.game_state['players'][player_id]['alive']:
+                self.record_final_score(player_id, died=False)
             self.game_state['players'].pop(player_id, None)
-            await self.send_state()
+            if limiter.rejected:
+                print(f"Player {player_id} rejected messages: {dict(limiter.rejected)}")
+            self.state_dirty = True
 
-    async def send_state(self):
+    def apply_player_state(self, player_id, data):
+        player = self.game_state['players'].get(player_id)
+        if player is None:
+            return
+        player.update({
+            'position': data['position'],
+            'direction': data['direction'],
+            'head_value': data['head_value'],
+            'segments': data['segments'],
+            'alive': True
+        })
+
+    def flush_pending_states(self):
+        """Apply coalesced player_state messages; True if any were applied."""
+        if not self.pending_states:
+            return False
+        for player_id, data in self.pending_states.items():
+            self.apply_player_state(player_id, data)
+        self.pending_states.clear()
+        return True
+
+    async def spectator_handler(self, websocket):
+        """Watch-only connection fed with the per-tick snapshot."""
+        self.spectators.add(websocket)
+        try:
+            await websocket.send(self.encode_state())
+            async for _ in websocket:
+                pass  # spectators have nothing to say
+        finally:
+            self.spectators.discard(websocket)
+
+    def encode_state(self):
+        # server_time lets tools measure how stale a snapshot is on arrival
+        return json.dumps({'type': 'game_state_update', 'server_time': time.time(),
+                           'game_state': self.game_state})
+
+    async def send_state(self, payload=None):
         if not self.clients:
             return
-        payload = json.dumps({'type': 'game_state_update', 'game_state': self.game_state})
+        payload = payload or self.encode_state()
         await asyncio.gather(*(c.send(payload) for c in list(self.clients.values()) if c.open))
 
+    def broadcast_spectators(self, payload):
+        """Fan the same encoded snapshot out without awaiting each spectator."""
+        if self.spectators:
+            websockets.broadcast(self.spectators, payload)
+
+    # ------------------------------------------------------------------
+    # Server tick: bots and cubes
+    # ------------------------------------------------------------------
+    def fill_bots(self):
+        """Add or remove bots so humans plus bots reach ``bot_fill``."""
+        wanted = max(0, self.bot_fill - len(self.clients))
+        while len(self.bots) < wanted:
+            bot = HeadlessBot(f"bot-{next(self._bot_ids)}")
+            self.bots[bot.player_id] = bot
+        while len(self.bots) > wanted:
+            bot_id, bot = self.bots.popitem()
+            if bot.alive and bot_id in self.game_state['players']:
+                self.record_final_score(bot_id, died=False)
+            self.game_state['players'].pop(bot_id, None)
+
+    def spawn_cube(self, position=None, value=None):
+        if position is None:
+            position = [random.uniform(-CUBE_SPAWN_RANGE, CUBE_SPAWN_RANGE), 0.5,
+                        random.uniform(-CUBE_SPAWN_RANGE, CUBE_SPAWN_RANGE)]
+        cube = {
+            'id': next(self._cube_ids),
+            'position': list(position),
+            'value': value or rules.random_cube_value(),
+        }
+        self.game_state['collectible_cubes'].append(cube)
+        return cube
+
+    def record_final_score(self, player_id, killer_id=None, died=True):
+        """Queue a player's final score (and death) for the score store."""
+        if self.store is None:
+            return
+        player = self.game_state['players'][player_id]
+        score = rules.snake_score(player['segments'])
+        if died:
+            self.store.record_death(player_id, killer_id, score)
+            if killer_id is not None:
+                self.store.record_kill(killer_id, player_id, score)
+        self.store.record_score(player_id, score, bot=player.get('bot', False))
+
+    @staticmethod
+    def beats(killer, victim):
+        """True if ``killer``'s head is close enough and big enough to have beaten ``victim``."""
+        if not (killer['alive'] and victim['alive']):
+            return False
+        kx, _, kz = killer['position']
+        vx, _, vz = victim['position']
+        if math.hypot(kx - vx, kz - vz) > KILL_CLAIM_RANGE:
+            return False
+        _, victim_dies = rules.head_clash(killer['head_value'], victim['head_value'])
+        return victim_dies
+
+    def can_claim_kill(self, player_id, bot):
+        players = self.game_state['players']
+        return bot.alive and self.beats(players[player_id], players[bot.player_id])
+
+    def find_killer(self, player_id):
+        """Nearest player or bot whose head could have killed ``player_id``."""
+        players = self.game_state['players']
+        victim = players[player_id]
+        vx, _, vz = victim['position']
+        killers = [(math.hypot(other['position'][0] - vx, other['position'][2] - vz), other_id)
+                   for other_id, other in players.items()
+                   if other_id != player_id and self.beats(other, victim)]
+        return min(killers)[1] if killers else None
+
+    def player_died(self, player_id):
+        """A client reported its own snake's death; record it with the likely killer."""
+        player = self.game_state['players'][player_id]
+        if not player['alive']:
+            return
+        killer_id = self.find_killer(player_id)
+        player['alive'] = False
+        self.record_final_score(player_id, killer_id=killer_id)
+
+    def kill_bot(self, bot, killer_id=None):
+        if not bot.alive:
+            return
+        self.game_state['players'][bot.player_id] = bot.to_state()
+        self.record_final_score(bot.player_id, killer_id)
+        for cube in bot.die():
+            self.spawn_cube(cube['position'], cube['value'])
+        self.game_state['players'][bot.player_id] = bot.to_state()
+
+    def step_bots(self, dt):
+        players = self.game_state['players']
+        cubes = self.game_state['collectible_cubes']
+        bots = list(self.bots.values())
+        for bot in bots:
+            if bot.alive:
+                bot.decide(players.items(), cubes)
+            bot.step(dt)
+            players[bot.player_id] = bot.to_state()
+        # Every bot has moved, so head sweeps below cover the same interval
+        prev_positions = {bot.player_id: bot.prev_position for bot in bots}
+        for bot in bots:
+            if bot.alive:
+                self.resolve_bot_collisions(bot, players, cubes, prev_positions)
+                players[bot.player_id] = bot.to_state()
+
+    def resolve_bot_collisions(self, bot, players, cubes, prev_positions):
+        if rules.out_of_arena(bot.x, bot.z):
+            self.kill_bot(bot)
+            return
+        cube = bot.touched_cube(cubes)
+        if cube is not None:
+            cubes.remove(cube)
+            if rules.can_collect(bot.head_value, cube['value']):
+                bot.eat(cube['value'])
+            else:
+                self.kill_bot(bot)
+                return
+        hit = bot.touched_head(players.items(), prev_positions)
+        if hit is not None:
+            other_id, other = hit
+            dies, other_dies = rules.head_clash(bot.head_value, other['head_value'])
+            if other_dies and other_id in self.bots:
+                self.kill_bot(self.bots[other_id], killer_id=bot.player_id)
+            # Humans resolve their own deaths on the client
+            if dies:
+                self.kill_bot(bot, killer_id=other_id)
+
+    async def tick_loop(self):
+        dt = 1 / self.tick_rate
+        while True:
+            self.fill_bots()
+            if self.bots:
+                self.step_bots(dt)
+            while len(self.game_state['collectible_cubes']) < self.cube_target:
+                self.spawn_cube()
+            players_changed = self.flush_pending_states() or bool(self.bots) or self.state_dirty
+            self.state_dirty = False
+            if players_changed or self.spectators:
+                # Encode the snapshot once per tick for everyone
+                payload = self.encode_state()
+                self.broadcast_spectators(payload)
+                if players_changed:
+                    await self.send_state(payload)
+            await asyncio.sleep(dt)
+
     async def run(self):
-        async with websockets.serve(self.handler, self.host, self.port):
-            print(f"Server started on {self.host}:{self.port}")
-            await asyncio.Future()  # Run forever
+        try:
+            async with websockets.serve(self.handler, self.host, self.port,
+                                        max_size=MAX_MESSAGE_BYTES):
+                print(f"Server started on {self.host}:{self.port}")
+                await self.tick_loop()  # Run forever
+        finally:
+            if self.store is not None:
+                for player_id, player in list(self.game_state['players'].items()):
+                    if player['alive']:
+                        self.record_final_score(player_id, died=False)
+                self.store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snake 2048 game server")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--bots', type=int, default=0,
+                        help="fill the room with server bots up to this many players")
+    parser.add_argument('--tick-rate', type=int, default=TICK_RATE)
+    parser.add_argument('--db', default='snake2048.db',
+                        help="SQLite file for match results, empty to disable")
+    parser.add_argument('--top', type=int, metavar='N',
+                        help="print the all-time top N scores and exit")
+    args = parser.parse_args()
+    if args.top and not args.db:
+        parser.error("--top needs a --db to read from")
+    store = ScoreStore(args.db) if args.db else None
+    if args.top:
+        for rank, (player_id, score, _) in enumerate(store.top_scores(args.top), 1):
+            print(f"{rank:>3}. {player_id}: {score}")
+        store.close()
+        return
+    server = GameServer(args.host, args.port, bot_fill=args.bots, tick_rate=args.tick_rate,
+                        store=store)
+    try:
+        asyncio.run(server.run())
+    except KeyboardInterrupt:
+        pass
+
 
 if __name__ == '__main__':
-    server = GameServer()
-    asyncio.run(server.run())
+    main()
@@ -0,0 +1,135 @@
+"""Lightweight hot-path profiler with per-phase timings.
+
+Wrap each phase of a frame in ``with profiler.scope('name'):``. While the
+profiler is disabled ``scope`` returns a shared no-op context manager, so the
+instrumentation costs one method call per phase. When enabled, the last
+``window`` samples of every phase are kept for rolling percentiles and running
+totals are kept for the dump written on exit.
+
+Set ``SNAKE2048_PROFILE=1`` to enable it at start and ``SNAKE2048_PROFILE_OUT``
+to choose the dump file (``.json`` or ``.csv``).
+"""
+import atexit
+import csv
+import json
+import os
+from collections import deque
+from time import perf_counter
+
+
+class _NullScope:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class _Scope:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, perf_counter() - self.start)
+        return False
+
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_samples:
+        return 0.0
+    idx = min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))
+    return sorted_samples[idx]
+
+
+class FrameProfiler:
+    """Scoped timers per phase with rolling statistics."""
+
+    def __init__(self, enabled=False, window=300):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}   # phase -> deque of seconds
+        self.totals = {}    # phase -> [count, total seconds, max seconds]
+
+    def scope(self, name):
+        if not self.enabled:
+            return _NULL_SCOPE
+        return _Scope(self, name)
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        return self.enabled
+
+    def record(self, name, seconds):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+            self.totals[name] = [0, 0.0, 0.0]
+        samples.append(seconds)
+        totals = self.totals[name]
+        totals[0] += 1
+        totals[1] += seconds
+        if seconds > totals[2]:
+            totals[2] = seconds
+
+    def reset(self):
+        self.samples.clear()
+        self.totals.clear()
+
+    def stats(self):
+        """Rolling statistics per phase in milliseconds."""
+        result = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            count, total, worst = self.totals[name]
+            result[name] = {
+                'p50_ms': percentile(ordered, 0.50) * 1000,
+                'p95_ms': percentile(ordered, 0.95) * 1000,
+                'p99_ms': percentile(ordered, 0.99) * 1000,
+                'mean_ms': total / count * 1000,
+                'max_ms': worst * 1000,
+                'count': count,
+            }
+        return result
+
+    def report(self):
+        """Short text table for an on-screen overlay."""
+        lines = [f"{'phase':<12}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for name, s in sorted(self.stats().items(), key=lambda kv: -kv[1]['p95_ms']):
+            lines.append(f"{name:<12}{s['p50_ms']:>7.2f}{s['p95_ms']:>7.2f}{s['p99_ms']:>7.2f}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Write statistics to ``path`` as CSV or JSON based on the extension."""
+        stats = self.stats()
+        if not stats:
+            return
+        if path.endswith('.csv'):
+            fields = ['phase', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                for name, s in stats.items():
+                    writer.writerow({'phase': name, **s})
+        else:
+            with open(path, 'w') as f:
+                json.dump(stats, f, indent=2)
+
+    def dump_on_exit(self, path=None):
+        path = path or os.environ.get('SNAKE2048_PROFILE_OUT', 'profile.json')
+        atexit.register(self.dump, path)
+
+
+profiler = FrameProfiler(enabled=os.environ.get('SNAKE2048_PROFILE') not in (None, '', '0'))
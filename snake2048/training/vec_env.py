@@ -0,0 +1,440 @@
+"""Vectorized multi-arena environment for bot tuning and mass simulation.
+
+``VecArenaEnv`` steps N independent arenas in lock-step with all state kept in
+NumPy arrays, gym style: ``reset()`` returns observations and
+``step(actions)`` returns ``(obs, rewards, dones, info)``. Snake 0 of every
+arena is the agent; the other snakes steer like ``BotSnake`` does with the
+shared influence map, using the same weights, with tunable
+:class:`BotParams`. Each arena holds only a few dozen entities, so every snake
+weighs all cubes, heads and bodies in view directly instead of through grid
+cells. ``ProcessVecArenaEnv`` spreads the arenas over a process pool.
+
+The arenas use a simplified version of the single player rules. Any cube can
+be eaten (``Snake.collect_cube``), and eating one of the head's value doubles
+the head. Bigger heads beat smaller ones head-on; equal clashes go to the snake
+checked first, as in ``Game.simulate``, so the agent plays the player's part.
+Bodies are deadly to heads smaller than their owner's head. Leaving the arena
+is fatal, and boosting costs one segment per second. Bodies follow the head
+trail at a fixed lag.
+
+    python -m snake2048.training.vec_env --envs 256 --workers 4 --steps 500
+
+Requires NumPy.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from ..game.influence import FOOD_WEIGHT, PREY_WEIGHT, THREAT_WEIGHT
+from ..game.timestep import SIM_RATE
+
+MAP_SIZE = 100
+NORMAL_SPEED = 4
+BOOST_SPEED = 8
+BOOST_DROP_INTERVAL = 1.0
+SEGMENT_SPACING = 0.5
+MAX_SEGMENTS = 64
+PICKUP_RADIUS = 1.0
+COMBAT_RADIUS = 0.9
+PLAYER_TURN_RATE = 4.0      # same steering rate as the mouse controlled snake
+WALL_MARGIN = 3
+CUBE_VALUES = np.array([2, 4, 8])
+CUBE_WEIGHTS = np.array([0.6, 0.3, 0.1])
+NEAREST_CUBES = 5           # cubes described in each observation
+NEAREST_SNAKES = 3          # other snakes described in each observation
+OBS_VIEW = 15.0             # relative positions are scaled by this distance
+MAX_LOG_VALUE = 11.0        # log2(2048)
+
+
+class BotParams:
+    """Tunable knobs of the scripted bot behaviour."""
+
+    def __init__(self, view_distance=15.0, hunt_ratio=1.5, flee_ratio=1.5, turn_rate=3.0,
+                 food_weight=FOOD_WEIGHT, threat_weight=THREAT_WEIGHT, prey_weight=PREY_WEIGHT):
+        self.view_distance = view_distance
+        self.hunt_ratio = hunt_ratio    # boost to hunt snakes whose head * ratio < ours
+        self.flee_ratio = flee_ratio    # boost to flee snakes whose head > ours * ratio
+        self.turn_rate = turn_rate
+        self.food_weight = food_weight
+        self.threat_weight = threat_weight
+        self.prey_weight = prey_weight
+
+
+def _normalize(v):
+    norm = np.linalg.norm(v, axis=-1, keepdims=True)
+    return v / np.maximum(norm, 1e-6)
+
+
+class VecArenaEnv:
+    """N arenas with K snakes and C cubes each, stepped together."""
+
+    obs_dim = 7 + NEAREST_CUBES * 3 + NEAREST_SNAKES * 5
+
+    def __init__(self, num_envs, snakes_per_arena=8, cubes_per_arena=30, map_size=MAP_SIZE,
+                 dt=1 / SIM_RATE, max_steps=3000, death_penalty=10.0, bot_params=None, seed=None):
+        self.num_envs = num_envs
+        self.num_snakes = snakes_per_arena
+        self.num_cubes = cubes_per_arena
+        self.half = map_size / 2
+        self.dt = dt
+        self.max_steps = max_steps
+        self.death_penalty = death_penalty
+        self.bot_params = bot_params or BotParams()
+        self.rng = np.random.default_rng(seed)
+        self.lag = max(1, round(SEGMENT_SPACING / (NORMAL_SPEED * dt)))
+        self.trail_len = self.lag * MAX_SEGMENTS
+
+        n, k, c = num_envs, snakes_per_arena, cubes_per_arena
+        self.pos = np.zeros((n, k, 2), np.float32)
+        self.dir = np.zeros((n, k, 2), np.float32)
+        self.value = np.zeros((n, k), np.int64)
+        self.length = np.zeros((n, k), np.int64)
+        self.score = np.zeros((n, k), np.float32)
+        self.alive = np.zeros((n, k), bool)
+        self.boost_timer = np.zeros((n, k), np.float32)
+        self.trail = np.zeros((n, k, self.trail_len, 2), np.float32)
+        self.cube_pos = np.zeros((n, c, 2), np.float32)
+        self.cube_value = np.zeros((n, c), np.int64)
+        self.steps = np.zeros(n, np.int64)
+        self.t = 0
+        self._seg_offsets = np.arange(MAX_SEGMENTS) * self.lag
+
+    # ------------------------------------------------------------------
+    # Spawning
+    # ------------------------------------------------------------------
+    def _spawn_snakes(self, mask):
+        count = int(mask.sum())
+        if not count:
+            return
+        spawn = self.half * 0.8
+        pos = self.rng.uniform(-spawn, spawn, (count, 2)).astype(np.float32)
+        angle = self.rng.uniform(0, 2 * np.pi, count)
+        self.pos[mask] = pos
+        self.dir[mask] = np.stack([np.cos(angle), np.sin(angle)], -1)
+        self.value[mask] = 2
+        self.length[mask] = 1
+        self.score[mask] = 0
+        self.alive[mask] = True
+        self.boost_timer[mask] = 0
+        self.trail[mask] = pos[:, None, :]
+
+    def _spawn_cubes(self, mask):
+        count = int(mask.sum())
+        if not count:
+            return
+        self.cube_pos[mask] = self.rng.uniform(-self.half, self.half, (count, 2))
+        self.cube_value[mask] = self.rng.choice(CUBE_VALUES, count, p=CUBE_WEIGHTS)
+
+    def _reset_arenas(self, arenas):
+        self._spawn_snakes(np.repeat(arenas[:, None], self.num_snakes, 1))
+        self._spawn_cubes(np.repeat(arenas[:, None], self.num_cubes, 1))
+        self.steps[arenas] = 0
+
+    def reset(self):
+        self._reset_arenas(np.ones(self.num_envs, bool))
+        return self.observe()
+
+    # ------------------------------------------------------------------
+    # Behaviour
+    # ------------------------------------------------------------------
+    def _pairwise_distance(self):
+        diff = self.pos[:, None, :, :] - self.pos[:, :, None, :]     # [n, i, j] = j - i
+        dist = np.linalg.norm(diff, axis=-1)
+        invalid = ~self.alive[:, None, :] | np.eye(self.num_snakes, dtype=bool)[None]
+        dist[invalid] = np.inf
+        return diff, dist
+
+    def scripted_actions(self):
+        """BotSnake steering for every snake as ``(targets, boost)`` arrays.
+
+        Mirrors ``InfluenceMap.steer``: everything within the view distance
+        pulls or pushes with a weight falling off as ``1 / (1 + d)``.
+        """
+        p = self.bot_params
+        diff, dist = self._pairwise_distance()
+        mine = self.value[:, :, None]
+        theirs = self.value[:, None, :]
+        in_view = dist < p.view_distance
+
+        def falloff(offset, d, pull):
+            weight = pull / (1 + d) / np.maximum(d, 1e-6)
+            return (offset * weight[..., None]).sum(-2)
+
+        # Every cube pulls in proportion to its value
+        to_cube = self.cube_pos[:, None, :, :] - self.pos[:, :, None, :]
+        cube_d = np.linalg.norm(to_cube, axis=-1)
+        pull = np.where(cube_d < p.view_distance, p.food_weight * self.cube_value[:, None, :], 0)
+        direction = falloff(to_cube, cube_d, pull)
+
+        # Heads: much bigger ones are fled, equal or bigger ones avoided and
+        # much smaller ones hunted
+        threat = in_view & (theirs > mine * p.flee_ratio)
+        risky = in_view & (theirs >= mine) & ~threat
+        prey = in_view & (theirs * p.hunt_ratio < mine)
+        pull = (prey * p.prey_weight - risky * p.threat_weight
+                - threat * 2 * p.threat_weight)
+        direction += falloff(diff, np.where(np.isfinite(dist), dist, 0), pull)
+
+        # Bodies: bigger owners push, smaller ones are food
+        body, valid = self._body_positions()
+        to_body = body[:, None] - self.pos[:, :, None, None, :]          # [n, i, j, s, 2]
+        body_d = np.sqrt((to_body ** 2).sum(-1))
+        seen = (valid[:, None] & self.alive[:, None, :, None]
+                & ~np.eye(self.num_snakes, dtype=bool)[None, :, :, None]
+                & (body_d < p.view_distance))
+        pull = np.where(theirs > mine, -p.threat_weight, p.food_weight * theirs)[..., None] * seen
+        direction += falloff(to_body, body_d, pull).sum(-2)
+
+        # Nothing in view: head for the nearest cube
+        empty = np.linalg.norm(direction, axis=-1) < 1e-6
+        nearest = np.take_along_axis(to_cube, cube_d.argmin(-1)[..., None, None], 2)[:, :, 0]
+        direction = np.where(empty[..., None], nearest, direction)
+
+        near_wall = (np.abs(self.pos) > self.half - WALL_MARGIN).any(-1)
+        direction = np.where(near_wall[..., None], -self.pos, direction)
+        return _normalize(direction), prey.any(-1) | threat.any(-1)
+
+    # ------------------------------------------------------------------
+    # Simulation step
+    # ------------------------------------------------------------------
+    def step(self, actions=None):
+        """Advance every arena one step.
+
+        ``actions`` is ``(N, 3)``: desired direction x, z and boost (> 0.5).
+        With ``None`` the agent follows the scripted bot behaviour too.
+        """
+        dt = self.dt
+        targets, boost = self.scripted_actions()
+        rate = np.full((self.num_envs, self.num_snakes, 1), self.bot_params.turn_rate, np.float32)
+        if actions is not None:
+            actions = np.asarray(actions, np.float32)
+            targets[:, 0] = _normalize(actions[:, :2])
+            boost[:, 0] = actions[:, 2] > 0.5
+            rate[:, 0] = PLAYER_TURN_RATE
+        boost &= self.length > 1
+        self.dir = _normalize(self.dir + (targets - self.dir) * np.minimum(1.0, rate * dt))
+
+        alive = self.alive
+        speed = np.where(boost, BOOST_SPEED, NORMAL_SPEED)
+        prev = self.pos.copy()
+        self.pos = np.where(alive[..., None], self.pos + self.dir * (speed * dt)[..., None], self.pos)
+        self.t += 1
+        self.trail[:, :, self.t % self.trail_len] = self.pos
+        score_before = self.score[:, 0].copy()
+
+        # Boost cost: one tail segment per interval
+        self.boost_timer = np.where(boost & alive, self.boost_timer + dt, 0)
+        drop = self.boost_timer > BOOST_DROP_INTERVAL
+        self.boost_timer[drop] = 0
+        self.length[drop] -= 1
+        self.score[drop] -= 2
+
+        self._collect_cubes(prev)
+        dead = np.zeros_like(alive)
+        dead |= (np.abs(self.pos) > self.half).any(-1) & alive
+        dead |= self._combat() & alive
+
+        # Bots respawn right away; the agent's death ends the episode
+        self.alive &= ~dead
+        self._spawn_snakes(dead & (np.arange(self.num_snakes) > 0))
+
+        self.steps += 1
+        rewards = self.score[:, 0] - score_before
+        agent_dead = dead[:, 0]
+        rewards[agent_dead] = -self.death_penalty
+        dones = agent_dead | (self.steps >= self.max_steps)
+        episode_score = np.where(dones, np.where(agent_dead, score_before, self.score[:, 0]), np.nan)
+        if dones.any():
+            self._reset_arenas(dones)
+        return self.observe(), rewards, dones, {'episode_score': episode_score}
+
+    def _collect_cubes(self, prev):
+        """Swept pickups of cubes of any value."""
+        a = prev[:, :, None, :]
+        ab = (self.pos - prev)[:, :, None, :]
+        ap = self.cube_pos[:, None, :, :] - a
+        t = np.clip((ap * ab).sum(-1) / np.maximum((ab ** 2).sum(-1), 1e-9), 0, 1)
+        closest = ab * t[..., None] - ap
+        hits = ((closest ** 2).sum(-1) < PICKUP_RADIUS ** 2) & self.alive[:, :, None]
+        taken = hits.any(1)                                    # [n, c]
+        if not taken.any():
+            return
+        winner = hits.argmax(1)                                # first snake wins a cube
+        got = taken[:, None, :] & (winner[:, None, :] == np.arange(self.num_snakes)[None, :, None])
+        values = np.where(got, self.cube_value[:, None, :], 0)
+        equal = (values == self.value[:, :, None]).any(-1)
+        self.score += values.sum(-1)
+        self.length = np.minimum(self.length + got.sum(-1), MAX_SEGMENTS)
+        self.value = np.where(equal, self.value * 2, self.value)
+        self._spawn_cubes(taken)
+
+    def _body_positions(self):
+        # Only as many segments as the longest snake has
+        segments = max(1, int(self.length.max()))
+        idx = (self.t - self._seg_offsets[:segments]) % self.trail_len
+        body = self.trail[:, :, idx]                           # [n, k, segments, 2]
+        valid = np.arange(segments)[None, None, :] < self.length[..., None]
+        valid[..., 0] = False                                  # the head is handled separately
+        return body, valid
+
+    def _combat(self):
+        """Head-on clashes and heads running into bigger snakes' bodies."""
+        _, dist = self._pairwise_distance()
+        mine = self.value[:, :, None]
+        theirs = self.value[:, None, :]
+        clash = (dist < COMBAT_RADIUS) & self.alive[:, :, None]
+        # Equal heads: the snake checked first wins, as with the single
+        # player game's ``snakes`` order, where the player comes first
+        index = np.arange(self.num_snakes)
+        first = (index[:, None] < index[None, :])[None]
+        wins = (mine > theirs) | ((mine == theirs) & first)
+        loses = (mine < theirs) | ((mine == theirs) & ~first)
+        dies = (clash & loses).any(-1)
+        # Winners of head-on clashes take the loser's score
+        beaten = clash & wins
+        self.score += (beaten * self.score[:, None, :]).sum(-1)
+
+        body, valid = self._body_positions()
+        head = self.pos[:, :, None, None, :]
+        touch = ((body[:, None] - head) ** 2).sum(-1) < COMBAT_RADIUS ** 2     # [n, i, j, s]
+        touch &= valid[:, None] & self.alive[:, None, :, None]
+        touch &= ~np.eye(self.num_snakes, dtype=bool)[None, :, :, None]
+        dies |= (touch.any(-1) & (mine < theirs)).any(-1)
+        return dies
+
+    # ------------------------------------------------------------------
+    # Observations
+    # ------------------------------------------------------------------
+    def observe(self):
+        """Agent-centric features, ``(N, obs_dim)`` float32."""
+        head = self.pos[:, 0]
+        own = np.column_stack([
+            np.log2(self.value[:, 0]) / MAX_LOG_VALUE,
+            self.length[:, 0] / MAX_SEGMENTS,
+            self.score[:, 0] / 1000,
+            self.dir[:, 0],
+            head / self.half,
+        ])
+
+        rel = self.cube_pos - head[:, None, :]
+        order = np.argsort((rel ** 2).sum(-1), axis=1)[:, :NEAREST_CUBES]
+        rel = np.take_along_axis(rel, order[..., None], 1) / OBS_VIEW
+        values = np.take_along_axis(self.cube_value, order, 1)
+        cubes = np.concatenate([rel, (np.log2(values) / MAX_LOG_VALUE)[..., None]], -1)
+
+        others = np.arange(1, self.num_snakes)
+        rel = self.pos[:, others] - head[:, None, :]
+        d2 = np.where(self.alive[:, others], (rel ** 2).sum(-1), np.inf)
+        order = np.argsort(d2, axis=1)[:, :NEAREST_SNAKES]
+        rel = np.take_along_axis(rel, order[..., None], 1) / OBS_VIEW
+        direction = np.take_along_axis(self.dir[:, others], order[..., None], 1)
+        log_diff = (np.log2(np.take_along_axis(self.value[:, others], order, 1))
+                    - np.log2(self.value[:, :1])) / MAX_LOG_VALUE
+        snakes = np.concatenate([rel, direction, log_diff[..., None]], -1)
+        snakes[~np.isfinite(np.take_along_axis(d2, order, 1))] = 0
+
+        return np.concatenate([
+            own, cubes.reshape(self.num_envs, -1), snakes.reshape(self.num_envs, -1)
+        ], 1).astype(np.float32)
+
+    def close(self):
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Process pool
+# ---------------------------------------------------------------------------
+def _worker(conn, num_envs, kwargs):
+    env = VecArenaEnv(num_envs, **kwargs)
+    while True:
+        command, data = conn.recv()
+        if command == 'step':
+            conn.send(env.step(data))
+        elif command == 'reset':
+            conn.send(env.reset())
+        else:
+            conn.close()
+            return
+
+
+class ProcessVecArenaEnv:
+    """Same interface as VecArenaEnv with the arenas split over processes."""
+
+    def __init__(self, num_envs, workers=None, seed=None, **kwargs):
+        workers = max(1, min(workers or os.cpu_count() or 1, num_envs))
+        self.num_envs = num_envs
+        self.obs_dim = VecArenaEnv.obs_dim
+        self.sizes = [len(part) for part in np.array_split(np.arange(num_envs), workers)]
+        self.splits = np.cumsum(self.sizes)[:-1]
+        self.conns = []
+        self.processes = []
+        for i, size in enumerate(self.sizes):
+            parent, child = multiprocessing.Pipe()
+            worker_kwargs = dict(kwargs, seed=None if seed is None else seed + i)
+            process = multiprocessing.Process(target=_worker, args=(child, size, worker_kwargs),
+                                              daemon=True)
+            process.start()
+            child.close()
+            self.conns.append(parent)
+            self.processes.append(process)
+
+    def reset(self):
+        for conn in self.conns:
+            conn.send(('reset', None))
+        return np.concatenate([conn.recv() for conn in self.conns])
+
+    def step(self, actions=None):
+        parts = (np.split(np.asarray(actions), self.splits) if actions is not None
+                 else [None] * len(self.conns))
+        for conn, part in zip(self.conns, parts):
+            conn.send(('step', part))
+        results = [conn.recv() for conn in self.conns]
+        obs, rewards, dones, infos = zip(*results)
+        info = {'episode_score': np.concatenate([i['episode_score'] for i in infos])}
+        return np.concatenate(obs), np.concatenate(rewards), np.concatenate(dones), info
+
+    def close(self):
+        for conn in self.conns:
+            conn.send(('close', None))
+        for process in self.processes:
+            process.join()
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+def benchmark(num_envs=256, steps=500, workers=1, seed=0):
+    """Run the scripted policy everywhere and return arena steps per second."""
+    if workers > 1:
+        env = ProcessVecArenaEnv(num_envs, workers=workers, seed=seed)
+    else:
+        env = VecArenaEnv(num_envs, seed=seed)
+    env.reset()
+    scores = []
+    started = time.perf_counter()
+    for _ in range(steps):
+        _, _, dones, info = env.step()
+        scores.extend(info['episode_score'][dones])
+    elapsed = time.perf_counter() - started
+    env.close()
+    return num_envs * steps / elapsed, scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized arena environment")
+    parser.add_argument('--envs', type=int, default=256)
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+    rate, scores = benchmark(args.envs, args.steps, args.workers)
+    print(f"{args.envs} arenas x {args.steps} steps: {rate:,.0f} arena steps/s "
+          f"({rate / SIM_RATE:,.0f}x real time)")
+    if scores:
+        print(f"{len(scores)} finished episodes, mean agent score {np.mean(scores):.1f}")
+
+
+if __name__ == '__main__':
+    main()